@@ -0,0 +1,145 @@
+"""
+End-to-end benchmarks, every *.zsd file in this directory is one benchmark.
+
+    python benchmarks/run.py                       # run everything, print JSON
+    python benchmarks/run.py -o results.json       # ...and save it
+    python benchmarks/run.py --baseline results.json --threshold 0.1
+
+Every measured run is a fresh process, so peak RSS is per run and one
+benchmark can't warm up the next. Runtime counters come from one extra run
+with stats enabled, that run isn't timed.
+"""
+from argparse import ArgumentParser
+import io
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+
+def child(path: Path, count_stats: bool):
+    """Run a single benchmark in this process and report on the real stdout"""
+    sys.path.insert(0, str(ROOT))
+    from interpreter import Interpreter
+    import natives
+    import stats
+    import zaurshadow
+
+    source = path.read_text(encoding="utf-8")
+    interpreter = Interpreter(io.StringIO(), sys.stderr)
+    natives.inject(interpreter)
+    if count_stats:
+        stats.enable(interpreter)
+    start = time.perf_counter()
+    zaurshadow.run(interpreter, source)
+    elapsed = time.perf_counter() - start
+
+    if interpreter.reporter.had_error or interpreter.reporter.had_runtime_error:
+        raise SystemExit(f"{path.name} failed to run.")
+
+    json.dump({"time": elapsed, "stats": interpreter.stats()}, sys.stdout)
+
+def run_once(path: Path, count_stats: bool = False):
+    command = [sys.executable, __file__, "--child", str(path)]
+    if count_stats:
+        command.append("--child-stats")
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    assert process.stdout is not None
+    result = process.stdout.read()
+    # wait4() gives the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise SystemExit(f"Benchmark {path.name} exited with {process.returncode}.")
+
+    report = json.loads(result)
+    # ru_maxrss is in kilobytes on linux
+    report["peak_rss_kb"] = usage.ru_maxrss
+    return report
+
+def percentile(values: list[float], fraction: float):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+def benchmark(path: Path, runs: int, warmup: int):
+    for _ in range(warmup):
+        run_once(path)
+
+    reports = [run_once(path) for _ in range(runs)]
+    times = [report["time"] for report in reports]
+    counters = run_once(path, count_stats=True)["stats"] or {}
+
+    return {
+        "runs": runs,
+        "median": statistics.median(times),
+        "p95": percentile(times, 0.95),
+        "min": min(times),
+        "peak_rss_kb": max(report["peak_rss_kb"] for report in reports),
+        "allocations": {
+            "environments": counters.get("environments", 0),
+            "bound_methods": counters.get("bound_methods", 0),
+            "objects": sum(counters.get("allocations", {}).values()),
+        },
+    }
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Return the names of benchmarks whose median got slower than the threshold allows"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        change = result["median"] / baseline[name]["median"] - 1
+        result["change"] = change
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = ArgumentParser(description="Run the ZSD benchmark suite.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all by default")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="measured runs per benchmark (default: 5)")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="unmeasured runs first (default: 1)")
+    parser.add_argument("-o", "--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against results saved earlier")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed median slowdown (default: 0.1)")
+    parser.add_argument("--child", type=Path, help="internal: run one benchmark")
+    parser.add_argument("--child-stats", action="store_true", help="internal: count runtime stats")
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.child_stats)
+
+    paths = sorted(HERE.glob("*.zsd"))
+    if args.names:
+        paths = [path for path in paths if path.stem in args.names]
+
+    results = {}
+    for path in paths:
+        print(f"{path.stem}...", file=sys.stderr)
+        results[path.stem] = benchmark(path, args.runs, args.warmup)
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+
+    text = json.dumps(results, indent=4)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+
+    for name in regressions:
+        print(f"Regression: {name} median is {results[name]["change"]:+.1%} over the baseline.", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
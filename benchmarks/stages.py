@@ -0,0 +1,180 @@
+"""
+Per-stage timings on generated sources, to see where startup time goes.
+
+    python benchmarks/stages.py                         # every shape, 4 doublings
+    python benchmarks/stages.py classes -s 200 -d 6     # one shape from 200 units up
+    python benchmarks/stages.py --json
+
+Every shape is generated at a base size that doubles at each step. Scanning,
+parsing, resolving and interpreting are timed separately (best of --repeat),
+and the ratio column shows how a stage grew from the previous size,
+about 2.0 means it scales linearly.
+"""
+from argparse import ArgumentParser
+from collections.abc import Callable
+import io
+import json
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from expr import Expr
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from zsdparser import Parser
+from output import Reporter
+import natives
+import stmt
+
+# region generators
+
+# Deeper nesting would only measure python's recursion limit
+NESTING_DEPTH = 40
+CHAIN_LENGTH = 40
+
+def nesting(size: int):
+    """Blocks and ifs nested NESTING_DEPTH deep, `size` statements in total"""
+    lines = []
+    for group in range(0, size, NESTING_DEPTH):
+        depth = min(NESTING_DEPTH, size - group)
+        lines.append(f"var g{group} = 0;")
+        for level in range(depth):
+            lines.append("    " * level + (f"if g{group} >= 0 {{" if level % 2 else "{"))
+            lines.append("    " * (level + 1) + f"g{group} = g{group} + {level};")
+        for level in reversed(range(depth)):
+            lines.append("    " * level + "}")
+    return "\n".join(lines)
+
+def expressions(size: int):
+    """`size` variables initialized by CHAIN_LENGTH long arithmetic chains"""
+    operators = "+-*+"
+    lines = []
+    for i in range(size):
+        chain = " ".join(f"{operators[j % 4]} {j % 7 + 1}" for j in range(CHAIN_LENGTH))
+        lines.append(f"var e{i} = {i} {chain};")
+    return "\n".join(lines)
+
+def classes(size: int):
+    """`size` classes, each instantiated once with a method call"""
+    lines = []
+    for i in range(size):
+        lines.append(f"class C{i} {{")
+        lines.append("    init(value) { this.value = value; }")
+        lines.append("    twice() { return this.value * 2; }")
+        lines.append("}")
+        lines.append(f"var c{i} = C{i}({i}).twice();")
+    return "\n".join(lines)
+
+def strings(size: int):
+    """`size` string literals of 1000 characters each"""
+    text = "lorem ipsum dolor sit amet " * 37
+    return "\n".join(f'var s{i} = "{text[:1000]}";' for i in range(size))
+
+SHAPES: dict[str, tuple[Callable[[int], str], int]] = {
+    "nesting": (nesting, 200),
+    "expressions": (expressions, 100),
+    "classes": (classes, 100),
+    "strings": (strings, 200),
+}
+
+# region measuring
+
+def count_nodes(node: object) -> int:
+    if isinstance(node, (list, tuple)):
+        return sum(count_nodes(child) for child in node)
+    if isinstance(node, dict):
+        return sum(count_nodes(child) for child in node.values())
+    if isinstance(node, (Expr, stmt.Stmt, stmt.Param)):
+        return 1 + sum(count_nodes(child) for child in vars(node).values())
+    return 0
+
+def best_of[T](repeat: int, setup: Callable[[], T], stage: Callable[[T], object]):
+    best = float("inf")
+    for _ in range(repeat):
+        value = setup()
+        start = time.perf_counter()
+        stage(value)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def measure(source: str, repeat: int):
+    reporter = Reporter()
+    tokens = Scanner(source, reporter).scan_tokens()
+    statements = Parser(tokens, reporter).parse()
+    if reporter.had_error:
+        raise SystemExit("Generated source failed to parse.")
+
+    interpreters: list[Interpreter] = []
+
+    def resolved():
+        interpreter = Interpreter(io.StringIO())
+        natives.inject(interpreter)
+        Resolver(interpreter).resolve(statements)
+        interpreters.append(interpreter)
+        return interpreter
+
+    timings = {
+        "scan": best_of(repeat, lambda: Scanner(source), Scanner.scan_tokens),
+        "parse": best_of(repeat, lambda: Parser(tokens), Parser.parse),
+        "resolve": best_of(repeat, lambda: Resolver(Interpreter()), lambda resolver: resolver.resolve(statements)),
+        "interpret": best_of(repeat, resolved, lambda interpreter: interpreter.interpret(statements)),
+    }
+
+    if any(interpreter.reporter.had_runtime_error for interpreter in interpreters):
+        raise SystemExit("Generated source failed to run.")
+
+    nodes = count_nodes(statements)
+    return {
+        "bytes": len(source),
+        "tokens": len(tokens),
+        "nodes": nodes,
+        **timings,
+        "tokens_per_second": len(tokens) / timings["scan"],
+        "nodes_per_second": nodes / timings["parse"],
+    }
+
+def print_table(shape: str, rows: list[dict]):
+    stages = ("scan", "parse", "resolve", "interpret")
+    print(f"\n{shape}")
+    print(f"{"size":>7} {"tokens":>8} {"nodes":>8}" + "".join(f" {name:>10} {"ratio":>5}" for name in stages) + f" {"tokens/s":>10} {"nodes/s":>10}")
+
+    previous = None
+    for row in rows:
+        line = f"{row["size"]:>7} {row["tokens"]:>8} {row["nodes"]:>8}"
+        for name in stages:
+            ratio = f"{row[name] / previous[name]:.2f}" if previous else ""
+            line += f" {row[name] * 1000:>8.2f}ms {ratio:>5}"
+        line += f" {row["tokens_per_second"]:>10.0f} {row["nodes_per_second"]:>10.0f}"
+        print(line)
+        previous = row
+
+def main():
+    parser = ArgumentParser(description="Time each pipeline stage on generated ZSD sources.")
+    parser.add_argument("shapes", nargs="*", choices=[[], *SHAPES], help="shapes to generate, all by default")
+    parser.add_argument("-s", "--size", type=int, help="base size in units of the shape")
+    parser.add_argument("-d", "--doublings", type=int, default=4, help="number of sizes (default: 4)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="take the best of this many runs (default: 3)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    args = parser.parse_args()
+
+    results: dict[str, list[dict]] = {}
+    for shape in args.shapes or SHAPES:
+        generate, default_size = SHAPES[shape]
+        size = args.size or default_size
+
+        rows = results[shape] = []
+        for step in range(args.doublings):
+            row = {"size": size << step, **measure(generate(size << step), args.repeat)}
+            rows.append(row)
+
+        if not args.json:
+            print_table(shape, rows)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass
 from itertools import zip_longest
 from typing import TYPE_CHECKING
 from environment import Environment
-from output import ReturnException, ZSDRuntimeError
+from output import NativeError, ReturnException, ZSDRuntimeError
 import stmt
 from zsdtoken import Token
 from literals import nil
@@ -21,31 +21,67 @@ class ZSDCallable(ABC):
     def arity(self) -> tuple[int, int]: 
         """Minimal and maximal arity in (min_args, max_args) form"""
 
+    def call_many(self, interpreter: Interpreter, argument_lists: Iterable[list[object]], arg_count: int) -> Iterator[object]:
+        """
+        Call this callable once per argument list, every list must hold `arg_count` arguments.
+        Arity is checked once up front instead of on every call.
+        """
+        message = arity_error(self, arg_count)
+        if message:
+            raise NativeError(message)
+
+        return (self.call(interpreter, arguments) for arguments in argument_lists)
+
+def arity_error(function: ZSDCallable, arg_len: int) -> str | None:
+    """Return an error message if `function` can't take `arg_len` arguments"""
+    min_arity, max_arity = function.arity()
+    s = lambda i: "" if i == 1 else "s"
+
+    if arg_len < min_arity:
+        return f"Expected at least {min_arity} argument{s(min_arity)} but received {arg_len} instead."
+    
+    if arg_len > max_arity:
+        return f"Expected at most {max_arity} argument{s(max_arity)} but received {arg_len} instead."
+
 @dataclass
 class ZSDParam:
     name: Token
     default: object | None
 
 class ZSDFunction(ZSDCallable):
-    def __init__(self, declaration: stmt.Function, parameters: list[ZSDParam], closure: Environment, is_init: bool = False) -> None:
+    def __init__(
+        self, 
+        declaration: stmt.Function, 
+        parameters: list[ZSDParam], 
+        closure: Environment, 
+        is_init: bool = False,
+        owner: str | None = None
+    ) -> None:
         self.declaration = declaration
         self.parameters = parameters
         self.closure = closure
         self.is_init = is_init
+        # Name of the declaring class for methods
+        self.owner = owner
         self.name = "function"
 
     def arity(self):
+        # Parameters with defaults can only be followed by other defaulted parameters
         try:
-            index = [p.default for p in self.parameters].index(None)
+            index = [p.default is not None for p in self.parameters].index(True)
         except ValueError:
-            index = -1
+            index = len(self.parameters)
 
         return (
-            index + 1,
+            index,
             len(self.parameters)
         )
 
     def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
+        return interpreter.call_function(self, self.frame(arguments))
+
+    def frame(self, arguments: list[object]) -> Environment:
+        """The environment a call runs the body in, with the parameters bound"""
         env = Environment(self.closure)
 
         # I assume here, that len(arguments) <= len(self.parameters)
@@ -60,6 +96,37 @@ class ZSDFunction(ZSDCallable):
 
             env.define(param.name.lexeme, arg)
 
+        return env
+
+    def call_many(self, interpreter: Interpreter, argument_lists: Iterable[list[object]], arg_count: int) -> Iterator[object]:
+        message = arity_error(self, arg_count)
+        if message:
+            raise NativeError(message)
+
+        # Every call gets the same frame layout, so work out which
+        # parameters are passed and which fall back to defaults only once
+        names = [param.name.lexeme for param in self.parameters[:arg_count]]
+        defaults = {param.name.lexeme: param.default for param in self.parameters[arg_count:]}
+
+        return self._call_many(interpreter, argument_lists, names, defaults)
+
+    def _call_many(self, interpreter: Interpreter, argument_lists: Iterable[list[object]], names: list[str], defaults: dict[str, object]):
+        closure = self.closure
+        for arguments in argument_lists:
+            env = Environment(closure)
+            env.values = dict(zip(names, arguments))
+            env.values.update(defaults)
+            yield interpreter.call_function(self, env)
+
+    def run(self, interpreter: Interpreter, env: Environment) -> object:
+        """
+        Execute the body in an environment with the parameters already bound.
+        Calls go through Interpreter.call_function() so profilers can hook them.
+        A generator's body doesn't run yet, it runs a step whenever a value is asked for.
+        """
+        if self.declaration.yielding:
+            return interpreter.generator(self.declaration, env)
+
         try:
             interpreter.execute_block(self.declaration.body, env)
         except ReturnException as exc:
@@ -79,7 +146,7 @@ class ZSDFunction(ZSDCallable):
         env = Environment(self.closure)
         env.define("this", instance)
         self.name = "bound method"
-        return type(self)(self.declaration, self.parameters, env)
+        return type(self)(self.declaration, self.parameters, env, self.is_init, self.owner)
 
     def __repr__(self) -> str:
         decl = self.declaration
@@ -96,23 +163,46 @@ class ZSDNativeFunction(ZSDFunction):
         arity: tuple[int, int], 
         name: str, 
         callable: Callable[..., object],
-        binding: "ZSDObject | None" = None
+        # Strings bind native methods too, so this isn't always a ZSDObject
+        binding: object = None,
+        # Natives that call back into ZSD get the calling interpreter as their first argument
+        pass_interpreter: bool = False
     ) -> None:
         self._arity = arity
         self.name = name
         self.callable = callable
         self.binding = binding
+        self.pass_interpreter = pass_interpreter
 
-    def bind(self, instance: "ZSDObject"):
-        return type(self)(self._arity, self.name, self.callable, instance)
+    def bind(self, instance: object):
+        return type(self)(self._arity, self.name, self.callable, instance, self.pass_interpreter)
 
     def arity(self):
         return self._arity
     
+    def leading(self, interpreter: Interpreter) -> tuple[object, ...]:
+        """Arguments the callable gets before the ZSD ones"""
+        if self.pass_interpreter:
+            return (interpreter, self.binding) if self.binding is not None else (interpreter,)
+        return (self.binding,) if self.binding is not None else ()
+    
     def call(self, interpreter: Interpreter, arguments: list[object]) -> object:
-        if self.binding:
+        if self.pass_interpreter:
+            return self.callable(*self.leading(interpreter), *arguments)
+        if self.binding is not None:
             return self.callable(self.binding, *arguments)
         return self.callable(*arguments)
+
+    def call_many(self, interpreter: Interpreter, argument_lists: Iterable[list[object]], arg_count: int) -> Iterator[object]:
+        message = arity_error(self, arg_count)
+        if message:
+            raise NativeError(message)
+
+        callable = self.callable
+        leading = self.leading(interpreter)
+        if leading:
+            return (callable(*leading, *arguments) for arguments in argument_lists)
+        return (callable(*arguments) for arguments in argument_lists)
     
     def __repr__(self) -> str:
         min, max = self.arity()
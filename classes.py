@@ -1,5 +1,5 @@
 from __future__ import annotations
-from collections.abc import Mapping
+from collections.abc import Callable, Mapping
 from typing import TYPE_CHECKING, Any
 from callables import ZSDCallable, ZSDFunction, ZSDNativeFunction
 from output import ZSDRuntimeError
@@ -31,6 +31,9 @@ class ZSDObject:
 
 
 class ZSDClass(ZSDCallable, ZSDObject):
+    # Built-in classes are shared by every interpreter in the process, so nothing may be set on them
+    frozen = False
+
     def __init__(
         self, 
         name: str, 
@@ -65,6 +68,11 @@ class ZSDClass(ZSDCallable, ZSDObject):
         
         raise ZSDRuntimeError(name, f"Undefined attribute {name.lexeme!r}.")
 
+    def set(self, name: Token, value: object):
+        if self.frozen:
+            raise ZSDRuntimeError(name, f"Cannot set attributes on the built-in class {self.name!r}.")
+        super().set(name, value)
+
     def arity(self):
         init = self.find_method("init")
         if init:
@@ -94,20 +102,27 @@ ZSDType = ZSDClass(
     True
 )
 ZSDType.fields["__class__"] = ZSDType
+ZSDType.frozen = True
     
 class ZSDNativeClass(ZSDClass):
+    frozen = True
+
     def __init__(
         self, 
         name: str, 
         init: ZSDNativeFunction, 
         methods: dict[str, ZSDNativeFunction], 
-        superclass: ZSDClass | None = None
+        superclass: ZSDClass | None = None,
+        factory: Callable[[], ZSDObject] | None = None
     ) -> None:
         super().__init__(name, methods, superclass)
         self.name = name
         self.init = init
         self.methods = methods | {init.name: init}
         self.superclass = superclass
+        # Native classes backed by a python object subclass ZSDObject
+        # and need to be instantiated through it
+        self.factory = factory
 
     def arity(self):
         return self.init.arity()
@@ -121,7 +136,7 @@ class ZSDNativeClass(ZSDClass):
             return self.superclass.find_method(name)
 
     def call(self, interpreter: Interpreter, arguments: list[object]) -> ZSDObject:
-        instance = ZSDObject(self)
+        instance = self.factory() if self.factory else ZSDObject(self)
         self.init.bind(instance).call(interpreter, arguments)
         return instance
     
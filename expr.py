@@ -11,7 +11,7 @@ if TYPE_CHECKING:
     from stmt import Function
     norepr_dataclass = dataclass
 else:
-    norepr_dataclass = partial(dataclass, repr=False)
+    norepr_dataclass = partial(dataclass, repr=False, eq=False)
 
 class Visitor[T](Protocol):
     def visit_assign_expr(self, expr: Assign) -> T: ...
@@ -29,6 +29,7 @@ class Visitor[T](Protocol):
     def visit_range_expr(self, expr: Range) -> T: ...
     def visit_anonobject_expr(self, expr: AnonObject) -> T: ...
     def visit_instanceof_expr(self, expr: InstanceOf) -> T: ...
+    def visit_interpolation_expr(self, expr: Interpolation) -> T: ...
  
 class Expr: 
     def accept[T](self, visitor: Visitor[T]) -> T: 
@@ -118,4 +119,9 @@ class AnonObject(Expr):
 class InstanceOf(Expr):
     left: Expr | None
     keyword: Token
-    right: Expr
\ No newline at end of file
+    right: Expr
+
+# Constant text is kept as str, only the Expr parts are evaluated
+@norepr_dataclass
+class Interpolation(Expr):
+    parts: list[str | Expr]
\ No newline at end of file
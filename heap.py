@@ -0,0 +1,212 @@
+from __future__ import annotations
+from collections import Counter
+from dataclasses import dataclass, field
+import sys
+from types import FrameType
+from typing import TYPE_CHECKING, TextIO
+from callables import ZSDFunction, ZSDNativeFunction
+from classes import ZSDClass, ZSDObject
+from environment import Environment
+from literals import ZSDRope
+from natives import ZSDAnonObject, ZSDGenerator, ZSDList
+from profiler import function_label
+
+if TYPE_CHECKING:
+    from interpreter import Interpreter
+
+def type_label(value: object) -> str:
+    if isinstance(value, ZSDClass):
+        return "class"
+    if isinstance(value, ZSDAnonObject):
+        return "<object>"
+    if isinstance(value, ZSDObject):
+        return value.klass.name
+    if isinstance(value, ZSDFunction):
+        return "native function" if isinstance(value, ZSDNativeFunction) else "function"
+    if isinstance(value, ZSDRope):
+        return "str"
+    return type(value).__name__
+
+def shallow_size(value: object) -> int:
+    """Approximate bytes owned by a single value, not counting what it references"""
+    size = sys.getsizeof(value)
+
+    if isinstance(value, Environment):
+        size += sys.getsizeof(value.values)
+    elif isinstance(value, ZSDObject):
+        size += sys.getsizeof(value.fields)
+        if isinstance(value, ZSDList):
+            size += sys.getsizeof(value.items)
+    elif isinstance(value, ZSDRope):
+        size += sys.getsizeof(value.parts) + sum(sys.getsizeof(part) for part in value.parts[:value.count])
+
+    if hasattr(value, "__dict__"):
+        size += sys.getsizeof(vars(value))
+    return size
+
+def references(value: object) -> list[tuple[str, object]]:
+    """The runtime values `value` keeps alive, with the name it holds them by"""
+    if isinstance(value, Environment):
+        refs = list(value.values.items())
+        if value.parent_scope is not None:
+            refs.append(("<parent>", value.parent_scope))
+        return refs
+
+    refs: list[tuple[str, object]] = []
+    if isinstance(value, ZSDObject):
+        refs.extend((f".{name}", field) for name, field in value.fields.items() if name != "__class__")
+        refs.append(("<class>", value.klass))
+
+    if isinstance(value, ZSDList):
+        refs.extend((f"[{i}]", item) for i, item in enumerate(value.items))
+    elif isinstance(value, (ZSDClass, ZSDAnonObject)):
+        refs.extend((f".{name}", method) for name, method in value.methods.items())
+        if isinstance(value, ZSDClass) and value.superclass is not None:
+            refs.append(("<superclass>", value.superclass))
+    elif isinstance(value, ZSDGenerator):
+        refs.extend(("<frame>", env) for env in [value.env, *suspended_environments(value.steps)] if env is not None)
+    elif isinstance(value, ZSDNativeFunction):
+        if value.binding is not None:
+            refs.append(("<this>", value.binding))
+    elif isinstance(value, ZSDFunction):
+        refs.append(("<closure>", value.closure))
+
+    return refs
+
+def frame_environments(frame: FrameType) -> list[Environment]:
+    return [value for value in frame.f_locals.values() if isinstance(value, Environment)]
+
+def suspended_environments(steps: object) -> list[Environment]:
+    """Environments the python frames of a suspended generator body or task hold, down its whole yield from chain"""
+    envs: list[Environment] = []
+    while (frame := getattr(steps, "gi_frame", None)) is not None:
+        envs.extend(frame_environments(frame))
+        steps = getattr(steps, "gi_yieldfrom", None)
+    return envs
+
+def active_environments(interpreter: Interpreter, frame: FrameType | None = None) -> list[Environment]:
+    """
+    Environments of blocks, loops and calls currently executing on this thread,
+    including the ones generator bodies and tasks were resumed from,
+    and the environments of tasks that are suspended.
+    """
+    envs = [interpreter.env]
+    frame = frame or sys._getframe()
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        # The interpreter's own frames, and the generators and scheduler that swap its environment
+        if owner is interpreter or getattr(owner, "interpreter", None) is interpreter:
+            envs.extend(frame_environments(frame))
+        frame = frame.f_back
+
+    if interpreter.scheduler is not None:
+        for fiber in interpreter.scheduler.alive:
+            if fiber.env is not None:
+                envs.append(fiber.env)
+            envs.extend(suspended_environments(fiber.steps))
+    return envs
+
+@dataclass
+class HeapSnapshot:
+    """Counts and approximate sizes of everything reachable from an interpreter"""
+    counts: Counter[str] = field(default_factory=Counter)
+    sizes: Counter[str] = field(default_factory=Counter)
+    # Distinct closure environments per function declaration
+    closures: Counter[str] = field(default_factory=Counter)
+    # (path from a root, retained bytes), biggest first
+    retainers: list[tuple[str, int]] = field(default_factory=list)
+
+    @classmethod
+    def take(cls, interpreter: Interpreter, retainer_count: int = 10) -> HeapSnapshot:
+        snapshot = cls()
+        roots = [("globals", interpreter.globals)] + [
+            (f"<active {i}>", env) for i, env in enumerate(active_environments(interpreter))
+        ]
+
+        # Walk breadth first, the BFS tree stands in for the retainer tree
+        seen: dict[int, int] = {}
+        nodes: list[object] = []
+        parents: list[int] = []
+        edges: list[str] = []
+        closures: dict[str, set[int]] = {}
+
+        for name, root in roots:
+            if id(root) not in seen:
+                seen[id(root)] = len(nodes)
+                nodes.append(root)
+                parents.append(-1)
+                edges.append(name)
+
+        index = 0
+        while index < len(nodes):
+            value = nodes[index]
+            for name, child in references(value):
+                if id(child) in seen:
+                    continue
+                seen[id(child)] = len(nodes)
+                nodes.append(child)
+                parents.append(index)
+                edges.append(name)
+
+            if isinstance(value, ZSDFunction) and not isinstance(value, ZSDNativeFunction):
+                closures.setdefault(function_label(value), set()).add(id(value.closure))
+            index += 1
+
+        retained = [shallow_size(value) for value in nodes]
+        for value, size in zip(nodes, retained):
+            label = type_label(value)
+            snapshot.counts[label] += 1
+            snapshot.sizes[label] += size
+
+        for index in range(len(nodes) - 1, -1, -1):
+            if parents[index] >= 0:
+                retained[parents[index]] += retained[index]
+
+        def path(index: int):
+            parts = []
+            while index >= 0:
+                parts.append(edges[index])
+                index = parents[index]
+            return "".join(part if part.startswith((".", "[", "<")) else f".{part}" for part in reversed(parts)).lstrip(".")
+
+        # The roots retain everything, they're not interesting
+        candidates = sorted(
+            (index for index in range(len(nodes)) if parents[index] >= 0 and isinstance(nodes[index], (ZSDObject, Environment))),
+            key=lambda index: retained[index],
+            reverse=True
+        )
+        snapshot.retainers = [(path(index), retained[index]) for index in candidates[:retainer_count]]
+        snapshot.closures = Counter({label: len(envs) for label, envs in closures.items()})
+        return snapshot
+
+    def diff(self, older: HeapSnapshot) -> HeapSnapshot:
+        """What changed since `older`, growth is positive"""
+        result = HeapSnapshot()
+        for mine, theirs, target in (
+            (self.counts, older.counts, result.counts),
+            (self.sizes, older.sizes, result.sizes),
+            (self.closures, older.closures, result.closures),
+        ):
+            for key in mine.keys() | theirs.keys():
+                delta = mine[key] - theirs[key]
+                if delta:
+                    target[key] = delta
+
+        previous = dict(older.retainers)
+        result.retainers = [(path, size - previous.get(path, 0)) for path, size in self.retainers if size != previous.get(path, 0)]
+        return result
+
+    def print_report(self, stream: TextIO = sys.stderr, limit: int = 20):
+        print(f"{"count":>10} {"bytes":>12}  type", file=stream)
+        for label, size in self.sizes.most_common(limit):
+            print(f"{self.counts[label]:>10} {size:>12}  {label}", file=stream)
+
+        if self.closures:
+            print(f"\n{"closures":>10}  function", file=stream)
+            for label, count in self.closures.most_common(limit):
+                print(f"{count:>10}  {label}", file=stream)
+
+        if self.retainers:
+            print(f"\n{"retained":>12}  path", file=stream)
+            for path, size in self.retainers:
+                print(f"{size:>12}  {path}", file=stream)
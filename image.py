@@ -0,0 +1,125 @@
+"""
+Heap images: the global state of an interpreter written to a file after an init phase,
+so a later process can load it and carry on instead of running the init again.
+
+    zaurshadow init.zsd --save-image tables.img
+    zaurshadow work.zsd --image tables.img
+
+Functions keep their closures and declarations, objects their classes, and the resolved
+scope distances come along so loaded functions still find their variables.
+The natives aren't written out, every process builds them at import and the image refers to them by name.
+
+An image is a pickle, only load images you wrote yourself.
+"""
+from __future__ import annotations
+import os
+from pathlib import Path
+import pickle
+from typing import TYPE_CHECKING, BinaryIO
+from callables import ZSDNativeFunction
+from classes import ZSDClass, ZSDType
+from literals import ZSDStopIteration, false, nil, true
+import natives
+
+if TYPE_CHECKING:
+    from interpreter import Interpreter
+
+MAGIC = b"ZSDIMG1\n"
+
+class ImageError(ValueError):
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
+def runtime_objects() -> dict[str, object]:
+    """Objects every process builds the same way at import, by the name an image uses for them"""
+    objects: dict[str, object] = {
+        "literal:true": true,
+        "literal:false": false,
+        "literal:nil": nil,
+        "literal:StopIteration": ZSDStopIteration,
+    }
+
+    candidates = {f"global:{name}": value for name, value in natives.initial_globals.items()}
+    candidates.update({f"natives:{name}": value for name, value in vars(natives).items()})
+    candidates["class:type"] = ZSDType
+
+    for name, value in candidates.items():
+        if not isinstance(value, (ZSDClass, ZSDNativeFunction)) or any(value is known for known in objects.values()):
+            continue
+        objects[name] = value
+        if isinstance(value, ZSDClass):
+            objects.update({f"{name}.{method_name}": method for method_name, method in value.methods.items()})
+
+    objects.update({f"string:{name}": method for name, method in natives.string_methods.items()})
+    return objects
+
+class ImagePickler(pickle.Pickler):
+    def __init__(self, file: BinaryIO) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        objects = runtime_objects()
+        self.names = {id(value): name for name, value in objects.items()}
+        # Bound natives are new objects every time, they're found by their callable
+        self.natives = {
+            id(value.callable): name
+            for name, value in objects.items()
+            if isinstance(value, ZSDNativeFunction)
+        }
+
+    def persistent_id(self, obj: object):
+        name = self.names.get(id(obj))
+        if name is not None:
+            return name
+
+        if isinstance(obj, ZSDNativeFunction):
+            name = self.natives.get(id(obj.callable))
+            if name is None:
+                raise ImageError(f"Native function {obj.name!r} isn't part of the runtime.")
+            return (name, obj.binding)
+        return None
+
+class ImageUnpickler(pickle.Unpickler):
+    def __init__(self, file: BinaryIO) -> None:
+        super().__init__(file)
+        self.objects = runtime_objects()
+
+    def persistent_load(self, pid: str | tuple[str, object]):
+        if isinstance(pid, tuple):
+            name, binding = pid
+            function = self.lookup(name)
+            assert isinstance(function, ZSDNativeFunction)
+            return function.bind(binding)
+        return self.lookup(pid)
+
+    def lookup(self, name: str):
+        try:
+            return self.objects[name]
+        except KeyError:
+            raise ImageError(f"The image needs {name!r}, which this runtime doesn't have.") from None
+
+def save(interpreter: Interpreter, path: str | Path):
+    """Write the globals of an interpreter, and everything they reach, to an image"""
+    # Written next to the target first, a failed save doesn't clobber an older image
+    partial = f"{path}.partial"
+    try:
+        with open(partial, "wb") as file:
+            file.write(MAGIC)
+            ImagePickler(file).dump((interpreter.globals, dict(interpreter.locals)))
+    except (pickle.PicklingError, TypeError) as e:
+        os.unlink(partial)
+        # Open files, mapped bytes and the like only mean something in this process
+        raise ImageError(f"The globals hold a value that can't be saved: {e}") from None
+    except BaseException:
+        os.unlink(partial)
+        raise
+    os.replace(partial, path)
+
+def load(interpreter: Interpreter, path: str | Path):
+    """Replace the globals of an interpreter with the ones saved in an image"""
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ImageError(f"{str(path)!r} is not a ZSD image.")
+        globals, locals = ImageUnpickler(file).load()
+
+    interpreter.globals = interpreter.env = globals
+    interpreter.own_locals().update(locals)
@@ -1,6 +1,9 @@
-from collections.abc import Sequence
+from collections.abc import Callable, Collection, Generator, Iterator, Sequence
+import sys
+import time
+from types import MappingProxyType
 import typing
-from callables import ZSDCallable, ZSDFunction, ZSDParam
+from callables import ZSDCallable, ZSDFunction, ZSDParam, arity_error
 from classes import ZSDClass, ZSDObject
 from environment import Environment
 from expr import (
@@ -11,6 +14,7 @@ from expr import (
     Get,
     Grouping,
     InstanceOf,
+    Interpolation,
     LiteralValue,
     Logical,
     Range,
@@ -24,26 +28,159 @@ from expr import (
 )
 import stmt
 import output
-from literals import ZSDStopIteration, true, false, nil
-from output import ReturnException, ZSDRuntimeError
+from literals import ZSDRope, concatenate, true, false, nil
+from output import LimitExceeded, NativeError, ReturnException, ZSDRuntimeError
 from tokentype import TokenType as tt
 from zsdtoken import Token
-from typing import Any
-from natives import ZSDAnonObject, range_class
+from typing import TYPE_CHECKING, Any
+from natives import ZSDAnonObject, ZSDGenerator, ZSDTask, await_function, iterate, range_class, string_methods, task_result
+
+if TYPE_CHECKING:
+    from _typeshed import SupportsWrite
+    from tasks import Scheduler
+
+TRACE_EVENTS = ("call", "return", "statement", "error")
+type TraceFunction = Callable[[str, object, Environment, object], object]
+# Steps between two looks at the clock and the step budget
+LIMIT_CHECK_INTERVAL = 1000
+# Statements a task walks with suspend() instead of executing them, the rest can't await anything
+SUSPENDING = frozenset((stmt.Expression, stmt.Var, stmt.Return, stmt.Block, stmt.If, stmt.While, stmt.For))
+# Raised by native iterables while a loop pulls the next value, like a file going bad halfway through
+ITERATION_ERRORS = (NativeError, OSError, UnicodeDecodeError)
+
+def iteration_error(token: Token, error: Exception) -> ZSDRuntimeError:
+    if isinstance(error, NativeError):
+        return ZSDRuntimeError(token, error.message)
+    if isinstance(error, OSError):
+        return ZSDRuntimeError(token, f"{error.strerror or error}.")
+    return ZSDRuntimeError(token, f"{error}.")
+
+class Limits:
+    """
+    The budget set_limits() puts on a script. Every function call and every loop iteration
+    is a step, and all of them are accounted for here: calls through the call_function()
+    and call_coroutine() hooks, loop iterations of any kind through the iterations() hook.
+    """
+    def __init__(self, steps: int | None, timeout: float | None, max_depth: int | None) -> None:
+        self.steps = steps
+        self.timeout = timeout
+        self.max_depth = max_depth
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        # Steps until the budget runs out, counted down in batches between two checks
+        self.remaining = None if steps is None else steps + 1
+        self.batch = self.countdown = LIMIT_CHECK_INTERVAL if self.remaining is None else min(self.remaining, LIMIT_CHECK_INTERVAL)
+        # Calls the running code is nested in, the scheduler swaps it along with the running task
+        self.depth = 0
+        # Set once a limit is hit, from then on every step fails with it
+        self.exceeded: str | None = None
+
+    def check(self, token: Token):
+        """Runs once the countdown hits zero, the fast path is inlined in the hooks"""
+        # Come back on the very next step if this one raises
+        self.countdown = 1
+        if self.exceeded is None and self.deadline is not None and time.monotonic() > self.deadline:
+            self.exceeded = f"Time limit of {self.timeout}s exceeded."
+        if self.exceeded is None and self.remaining is not None:
+            self.remaining -= self.batch
+            if self.remaining <= 0:
+                self.exceeded = f"Step limit of {self.steps} exceeded."
+            else:
+                self.batch = min(self.remaining, LIMIT_CHECK_INTERVAL)
+        if self.exceeded is not None:
+            raise LimitExceeded(token, self.exceeded)
+        self.countdown = self.batch
+
+    def limit_calls(self, call_function: Callable[[ZSDFunction, Environment], object]):
+        max_depth = self.max_depth
+
+        def limited_call_function(function: ZSDFunction, env: Environment) -> object:
+            self.countdown -= 1
+            if not self.countdown:
+                self.check(function.declaration.name)
+            if self.depth == max_depth:
+                raise LimitExceeded(function.declaration.name, f"Call depth limit of {max_depth} exceeded.")
+            
+            self.depth += 1
+            try:
+                return call_function(function, env)
+            except RecursionError:
+                raise LimitExceeded(function.declaration.name, "Call depth limit exceeded.") from None
+            finally:
+                self.depth -= 1
+        return limited_call_function
+
+    def limit_coroutines(self, call_coroutine: Callable[[ZSDFunction, Environment], Generator[ZSDTask, None, object]]):
+        max_depth = self.max_depth
+
+        def limited_call_coroutine(function: ZSDFunction, env: Environment) -> Generator[ZSDTask, None, object]:
+            self.countdown -= 1
+            if not self.countdown:
+                self.check(function.declaration.name)
+            if self.depth == max_depth:
+                raise LimitExceeded(function.declaration.name, f"Call depth limit of {max_depth} exceeded.")
+
+            # No finally, the depth of a task that's suspended or thrown away is the scheduler's to keep
+            self.depth += 1
+            try:
+                result = yield from call_coroutine(function, env)
+            except RecursionError:
+                raise LimitExceeded(function.declaration.name, "Call depth limit exceeded.") from None
+            self.depth -= 1
+            return result
+        return limited_call_coroutine
+
+    def limit_iterations(self, iterations: Callable[[stmt.While | stmt.For, Iterator[object]], Iterator[object]]):
+        def limited_iterations(loop: stmt.While | stmt.For, iterator: Iterator[object]) -> Iterator[object]:
+            for value in iterations(loop, iterator):
+                self.countdown -= 1
+                if not self.countdown:
+                    self.check(loop.keyword)
+                yield value
+        return limited_iterations
 
 # region Interpreter
 class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
-    def __init__(self) -> None:
+    def __init__(self, stream: "SupportsWrite[str] | None" = None, errors: "SupportsWrite[str] | None" = None) -> None:
+        """
+        Everything a script can touch lives on the instance,
+        so separate interpreters can run side by side in threads.
+        `stream` gets what the script prints, `errors` the error reports, and defaults to `stream`.
+        Without either they go to whatever sys.stdout is at the time.
+        """
         self.globals = Environment()
         self.env = self.globals
-        self.locals: dict[Expr, int] = {}
+        # A compiled Program hands out a read-only view, copied by own_locals() before anything is added
+        self.locals: dict[Expr, int] | MappingProxyType[Expr, int] = {}
+        self.stream = stream
+        self.reporter = output.Reporter(errors or stream, stream)
+        # (owner, method name, wrap) in the order they were added, see add_hook()
+        self._hooks: list[tuple[object, str, Callable[[Callable], Callable]]] = []
+        # The budget of set_limits(), None while unlimited
+        self.limits: Limits | None = None
+        # Created by the first spawn(), sleep() or async read
+        self.scheduler: Scheduler | None = None
 
     def interpret(self, statements: Sequence[stmt.Stmt]):
         try: 
             for statement in statements:
                 self.execute(statement)
+            if self.scheduler is not None:
+                self.scheduler.drain()
         except ZSDRuntimeError as e:
-            output.runtime_error(e)
+            self.reporter.runtime_error(e)
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.close()
+            self.flush()
+
+    def flush(self):
+        """Write out what a buffered stream still holds, the end of every interpret() does this"""
+        output.flush(self.stream or sys.stdout)
+
+    def stats(self) -> dict[str, object] | None:
+        """Runtime counters, None unless stats.enable() was called on this interpreter"""
+        counted = self.__dict__.get("_stats")
+        return None if counted is None else counted.snapshot()
 
     def shadowize(self, object: object):
         if object is None: return nil
@@ -58,7 +195,13 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
         return stmt.accept(self)
     
     def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
+        self.own_locals()[expr] = depth
+
+    def own_locals(self) -> dict[Expr, int]:
+        """The scope distances, copied first if they're still a Program's read-only view"""
+        if type(self.locals) is MappingProxyType:
+            self.locals = dict(self.locals)
+        return typing.cast(dict[Expr, int], self.locals)
     
     def check_type(self, operand: object, operator: Token):
         if isinstance(operand, (float, int)): return
@@ -77,6 +220,141 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
         finally: 
             self.env = previous
 
+    def call_function(self, function: ZSDFunction, env: Environment) -> object:
+        """
+        Every ZSD function call ends up here.
+        Profilers replace this on the instance, so there is no cost when they're off.
+        """
+        return function.run(self, env)
+
+    def call_coroutine(self, function: ZSDFunction, env: Environment) -> Generator[ZSDTask, None, object]:
+        """
+        call_function() for the calls a spawned task can suspend in, see coroutine().
+        The body runs as a coroutine that yields every unfinished task it awaits, hooks wrap it like call_function().
+        """
+        return self.run_coroutine(function.declaration, env)
+
+    def iterations(self, loop: stmt.While | stmt.For, iterator: Iterator[object]) -> Iterator[object]:
+        """
+        Every loop, in a generator body or not, takes its iterations from here.
+        Like call_function() it's a place to hook, the plain one hands the iterator back as it is.
+        """
+        return iterator
+
+    def add_hook(self, owner: object, name: str, wrap: Callable[[Callable], Callable]):
+        """
+        Replace the method `name` on this instance with `wrap(method as it is now)`.
+        Hooks stack in the order they're added, and remove_hooks() takes out the layers
+        of one owner while the others keep running, whatever order they came in.
+        """
+        self._hooks.append((owner, name, wrap))
+        setattr(self, name, wrap(getattr(self, name)))
+
+    def remove_hooks(self, owner: object):
+        """Take out every layer `owner` added, the layers above them get wrapped around what's left"""
+        names = {name for hook_owner, name, _ in self._hooks if hook_owner == owner}
+        if not names:
+            return
+
+        self._hooks = [hook for hook in self._hooks if hook[0] != owner]
+        for name in names:
+            # Start over from the plain method, an instance without hooks pays nothing
+            self.__dict__.pop(name, None)
+            for _, hooked, wrap in self._hooks:
+                if hooked == name:
+                    setattr(self, name, wrap(getattr(self, name)))
+
+    def set_trace(self, callback: TraceFunction | None, events: Collection[str] = TRACE_EVENTS):
+        """
+        Call `callback(event, node, env, value)` on the given events:
+        "call" and "return" get the stmt.Function, its environment and the function or return value,
+        "statement" gets every statement before it runs,
+        "error" gets the statement a runtime error escaped first, and the error.
+
+        Tracing hooks execute(), call_function() and call_coroutine() on this instance,
+        so an untraced interpreter runs without any per-node checks.
+        Passing None removes the hook, any other hooks stay.
+        """
+        self.remove_hooks("trace")
+
+        if callback is None:
+            return
+        
+        unknown = set(events) - set(TRACE_EVENTS)
+        if unknown:
+            raise ValueError(f"Unknown trace events: {", ".join(sorted(unknown))}")
+
+        if "call" in events or "return" in events:
+            trace_call = "call" in events
+            trace_return = "return" in events
+
+            def trace_calls(call_function: Callable[[ZSDFunction, Environment], object]):
+                def traced_call_function(function: ZSDFunction, env: Environment) -> object:
+                    if trace_call:
+                        callback("call", function.declaration, env, function)
+                    result = call_function(function, env)
+                    if trace_return:
+                        callback("return", function.declaration, env, result)
+                    return result
+                return traced_call_function
+            
+            def trace_coroutines(call_coroutine: Callable[[ZSDFunction, Environment], Generator[ZSDTask, None, object]]):
+                def traced_call_coroutine(function: ZSDFunction, env: Environment) -> Generator[ZSDTask, None, object]:
+                    if trace_call:
+                        callback("call", function.declaration, env, function)
+                    result = yield from call_coroutine(function, env)
+                    if trace_return:
+                        callback("return", function.declaration, env, result)
+                    return result
+                return traced_call_coroutine
+            
+            self.add_hook("trace", "call_function", trace_calls)
+            self.add_hook("trace", "call_coroutine", trace_coroutines)
+
+        if "statement" in events or "error" in events:
+            trace_statement = "statement" in events
+            trace_error = "error" in events
+            # Only the innermost statement an error escapes from reports it
+            reported: list[ZSDRuntimeError | None] = [None]
+
+            def trace_statements(execute: Callable[[stmt.Stmt], object]):
+                def traced_execute(statement: stmt.Stmt):
+                    if trace_statement:
+                        callback("statement", statement, self.env, None)
+                    try:
+                        return execute(statement)
+                    except ZSDRuntimeError as e:
+                        if trace_error and not isinstance(e, ReturnException) and reported[0] is not e:
+                            reported[0] = e
+                            callback("error", statement, self.env, e)
+                        raise
+                return traced_execute
+                
+            self.add_hook("trace", "execute", trace_statements)
+
+    def set_limits(self, steps: int | None = None, timeout: float | None = None, max_depth: int | None = None):
+        """
+        Stop the script with a LimitExceeded runtime error once it has taken `steps` steps,
+        ran for `timeout` seconds from now, or nested more than `max_depth` calls.
+        A step is a function call or a loop iteration, that's where every runaway script has to pass.
+        Hitting python's own recursion limit is reported as exceeding the call depth too.
+
+        The clock is only looked at every LIMIT_CHECK_INTERVAL steps, so the timeout can be overshot by that much.
+        Once a limit is hit every later step raises again, so code that carries on after the error stops too.
+        Like tracing, limits hook the call and loop methods on this instance, so an unlimited interpreter pays nothing.
+        Calling this again starts over, with no arguments it removes the limits and leaves other hooks alone.
+        """
+        self.remove_hooks("limits")
+        self.limits = None
+
+        if steps is None and timeout is None and max_depth is None:
+            return
+
+        limits = self.limits = Limits(steps, timeout, max_depth)
+        self.add_hook("limits", "call_function", limits.limit_calls)
+        self.add_hook("limits", "call_coroutine", limits.limit_coroutines)
+        self.add_hook("limits", "iterations", limits.limit_iterations)
+
     def is_truthy(self, value: object):
         # Ruby's implementation
         return bool(value)
@@ -100,12 +378,14 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
                 self.execute(stmt.else_branch)
 
     def visit_while_stmt(self, stmt: stmt.While) -> None:
-        while self.is_truthy(self.evaluate(stmt.condition)):
+        condition = stmt.condition
+        # The iterator ends once the condition is false
+        for _ in self.iterations(stmt, iter(lambda: self.is_truthy(self.evaluate(condition)), False)):
             self.execute(stmt.body)
     
     def visit_print_stmt(self, stmt: stmt.Print) -> None:
         value = self.evaluate(stmt.expression)
-        return print(value)
+        return print(value, file=self.stream)
     
     def visit_var_stmt(self, stmt: stmt.Var) -> None:
         value = self.evaluate(stmt.initializer)
@@ -135,7 +415,7 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
         methods: dict[str, ZSDFunction] = {}
         for method in stmt.methods:
             parameters = [ZSDParam(param.name, param.default and self.evaluate(param.default)) for param in method.params]
-            function = ZSDFunction(method, parameters, self.env, method.name.lexeme == "init")
+            function = ZSDFunction(method, parameters, self.env, method.name.lexeme == "init", stmt.name.lexeme)
             methods[method.name.lexeme] = function
 
         klass = ZSDClass(stmt.name.lexeme, methods, superclass)
@@ -146,30 +426,238 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
 
         self.env.assign(stmt.name, klass)
 
+    def loop_iterator(self, stmt: stmt.For, iterable: object) -> Iterator[object]:
+        try:
+            return iterate(self, iterable)
+        except NativeError as e:
+            raise ZSDRuntimeError(stmt.keyword, e.message)
+
     def visit_for_stmt(self, stmt: stmt.For) -> None:
-        iterable = self.evaluate(stmt.iterable)
-        assert isinstance(iterable, ZSDObject)
+        iterator = self.iterations(stmt, self.loop_iterator(stmt, self.evaluate(stmt.iterable)))
+        
+        previous = self.env
+        try:
+            self.env = Environment(previous)
+            self.env.define(stmt.iter_var.lexeme, nil)
+
+            # The loop variable has a scope of its own, no need to walk the chain
+            values = self.env.values
+            name = stmt.iter_var.lexeme
+            for next_value in iterator:
+                values[name] = next_value
+                self.execute(stmt.body)
+        except ITERATION_ERRORS as e:
+            raise iteration_error(stmt.keyword, e) from None
+        finally:
+            self.env = previous
+
+    def visit_yield_stmt(self, stmt: stmt.Yield):
+        # Generator bodies run through generate(), which never gets here
+        raise ZSDRuntimeError(stmt.keyword, "Cannot yield here.")
+
+    # region generators
 
-        iter_func = iterable.klass.find_method("iter")
-        if iter_func is None:
+    def generator(self, declaration: stmt.Function, env: Environment) -> ZSDGenerator:
+        return ZSDGenerator(self, self.run_generator(declaration, env))
 
-            next_func = iterable.klass.find_method("next")
-            if next_func is None:
-                raise ZSDRuntimeError(stmt.keyword, f"{iterable.klass.name!r} object is not iterable.")
-            iterator = iterable
+    def run_generator(self, declaration: stmt.Function, env: Environment) -> Iterator[object]:
+        """
+        Walk a generator's body, stopping at every yield.
+        Only the statements with a yield inside go through here,
+        everything else runs through execute() like in any other function.
+        The environment isn't restored when a body stops, ZSDGenerator.resume() swaps it.
+        """
+        self.env = env
+        try:
+            yield from self.generate_statements(declaration.body.statements, declaration.yielding)
+        except ReturnException:
+            pass
+
+    def generate_statements(self, statements: list[stmt.Stmt], yielding: frozenset[stmt.Stmt]) -> Iterator[object]:
+        for statement in statements:
+            if statement not in yielding:
+                self.execute(statement)
+            elif type(statement) is stmt.Yield:
+                yield self.evaluate(statement.value)
+            else:
+                yield from self.generate(statement, yielding)
+
+    def generate_body(self, body: stmt.Stmt, env: Environment, yielding: frozenset[stmt.Stmt]) -> Iterator[object]:
+        """Run the body of an if or a loop in `env`, a block body gets a scope of its own"""
+        previous = self.env
+        if type(body) is stmt.Block:
+            self.env = Environment(env)
+            yield from self.generate_statements(body.statements, yielding)
         else:
-            iterator = iter_func.bind(iterable).call(self, [])
-            assert isinstance(iterator, ZSDObject)
+            self.env = env
+            yield from self.generate_statements([body], yielding)
+        self.env = previous
+
+    def generate(self, statement: stmt.Stmt, yielding: frozenset[stmt.Stmt]) -> Iterator[object]:
+        # No finally to restore the environment, a generator that's thrown away
+        # gets closed whenever python collects it and mustn't touch the interpreter then
+        match statement:
+            case stmt.Block():
+                previous = self.env
+                self.env = Environment(previous)
+                yield from self.generate_statements(statement.statements, yielding)
+                self.env = previous
+
+            case stmt.If():
+                for cond, body in statement.conditions:
+                    if self.is_truthy(self.evaluate(cond)):
+                        yield from self.generate_body(body, self.env, yielding)
+                        break
+                else:
+                    if statement.else_branch:
+                        yield from self.generate_body(statement.else_branch, self.env, yielding)
+
+            case stmt.While():
+                condition = statement.condition
+                for _ in self.iterations(statement, iter(lambda: self.is_truthy(self.evaluate(condition)), False)):
+                    yield from self.generate_body(statement.body, self.env, yielding)
+
+            case stmt.For():
+                iterator = self.iterations(statement, self.loop_iterator(statement, self.evaluate(statement.iterable)))
+                env = Environment(self.env)
+                values = env.values
+                name = statement.iter_var.lexeme
+                try:
+                    for next_value in iterator:
+                        values[name] = next_value
+                        yield from self.generate_body(statement.body, env, yielding)
+                except ITERATION_ERRORS as e:
+                    raise iteration_error(statement.keyword, e) from None
+
+    # region coroutines
+
+    def coroutine(self, callee: ZSDCallable, arguments: list[object]) -> Generator[ZSDTask, None, object]:
+        """
+        Call `callee` from a spawned task. A ZSD function runs as a coroutine, so its awaits
+        suspend the task and the scheduler can run others, anything else is called as usual.
+        The arity is the caller's to check.
+        """
+        if type(callee) is ZSDFunction and not callee.is_init and not callee.declaration.yielding:
+            return (yield from self.call_coroutine(callee, callee.frame(arguments)))
+        return callee.call(self, arguments)
+
+    def run_coroutine(self, declaration: stmt.Function, env: Environment) -> Generator[ZSDTask, None, object]:
+        """
+        Walk a function's body for a task, like run_generator() walks a generator's.
+        Calls written as a statement of their own, like `f();`, `var x = f();`, `x = f();` and `return f();`,
+        are made through coroutine() so awaits anywhere down that chain suspend the whole task.
+        An await nested deeper in an expression can't suspend, it runs the other tasks right there until it's done.
+        """
+        previous = self.env
+        self.env = env
+        try:
+            yield from self.suspend_statements(declaration.body.statements)
+            value = nil
+        except ReturnException as e:
+            value = e.value
+        self.env = previous
+        return value
 
-            next_func = iterator.klass.find_method("next")
-            if next_func is None:
-                raise ZSDRuntimeError(stmt.keyword, f"{iterator.klass.name!r} object is not an iterator.")
-        
-        self.env.define(stmt.iter_var.lexeme, nil)
+    def suspend_statements(self, statements: list[stmt.Stmt]) -> Generator[ZSDTask, None, None]:
+        for statement in statements:
+            if type(statement) in SUSPENDING:
+                yield from self.suspend(statement)
+            else:
+                self.execute(statement)
 
-        while (next_value := next_func.bind(iterator).call(self, [])) is not ZSDStopIteration:
-            self.env.assign(stmt.iter_var, next_value)
-            self.execute(stmt.body)
+    def suspend_body(self, body: stmt.Stmt, env: Environment) -> Generator[ZSDTask, None, None]:
+        """Run the body of an if or a loop in `env`, like generate_body()"""
+        previous = self.env
+        if type(body) is stmt.Block:
+            self.env = Environment(env)
+            yield from self.suspend_statements(body.statements)
+        else:
+            self.env = env
+            yield from self.suspend_statements([body])
+        self.env = previous
+
+    def suspend(self, statement: stmt.Stmt) -> Generator[ZSDTask, None, None]:
+        # Nothing restores the environment on errors, the scheduler swaps it back around every task
+        match statement:
+            case stmt.Expression(expression=Call() as call):
+                yield from self.suspend_call(call)
+
+            case stmt.Expression(expression=Assign(value=Call() as call) as assign):
+                value = yield from self.suspend_call(call)
+                distance = self.locals.get(assign, None)
+                if distance is not None:
+                    self.env.assign_at(assign.name.lexeme, value, distance)
+                else:
+                    self.globals.assign(assign.name, value)
+
+            case stmt.Var(initializer=Call() as call):
+                value = yield from self.suspend_call(call)
+                self.env.define(statement.name.lexeme, value)
+
+            case stmt.Return(value=Call() as call):
+                raise ReturnException(statement, (yield from self.suspend_call(call)))
+
+            case stmt.Block():
+                previous = self.env
+                self.env = Environment(previous)
+                yield from self.suspend_statements(statement.statements)
+                self.env = previous
+
+            case stmt.If():
+                for cond, body in statement.conditions:
+                    if self.is_truthy(self.evaluate(cond)):
+                        yield from self.suspend_body(body, self.env)
+                        break
+                else:
+                    if statement.else_branch:
+                        yield from self.suspend_body(statement.else_branch, self.env)
+
+            case stmt.While():
+                condition = statement.condition
+                for _ in self.iterations(statement, iter(lambda: self.is_truthy(self.evaluate(condition)), False)):
+                    yield from self.suspend_body(statement.body, self.env)
+
+            case stmt.For():
+                iterator = self.iterations(statement, self.loop_iterator(statement, self.evaluate(statement.iterable)))
+                env = Environment(self.env)
+                values = env.values
+                name = statement.iter_var.lexeme
+                try:
+                    for next_value in iterator:
+                        values[name] = next_value
+                        yield from self.suspend_body(statement.body, env)
+                except ITERATION_ERRORS as e:
+                    raise iteration_error(statement.keyword, e) from None
+
+            case _:
+                self.execute(statement)
+
+    def suspend_call(self, expr: Call) -> Generator[ZSDTask, None, object]:
+        """visit_call_expr() for a call a task can suspend in"""
+        callee = self.evaluate(expr.callee)
+        if callee is not await_function and type(callee) is not ZSDFunction:
+            # The callee is evaluated already, the usual visit gets its value
+            return self.visit_call_expr(Call(LiteralValue(callee), expr.paren, expr.arguments))
+
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+        message = arity_error(callee, len(arguments))
+        if message:
+            raise ZSDRuntimeError(expr.paren, message)
+
+        if callee is not await_function:
+            return (yield from self.coroutine(callee, arguments))
+
+        try:
+            task = arguments[0]
+            if not isinstance(task, ZSDTask):
+                # The usual error message
+                return await_function.call(self, arguments)
+            while not task.done:
+                # Hand the task to the scheduler, it carries on here once the task is done
+                yield task
+            return task_result(self, task)
+        except NativeError as e:
+            raise ZSDRuntimeError(expr.paren, e.message)
 
     # region visit exprs
 
@@ -197,6 +685,12 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
     def visit_literalvalue_expr(self, expr: LiteralValue) -> object:
         return expr.value
     
+    def visit_interpolation_expr(self, expr: Interpolation) -> object:
+        return "".join([
+            part if type(part) is str else str(self.evaluate(part)) 
+            for part in expr.parts
+        ])
+    
     def visit_grouping_expr(self, expr: Grouping) -> object:
         return self.evaluate(expr.expression)
     
@@ -226,8 +720,10 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
             case tt.SLASH | tt.SLASH_EQUAL:
                 return shadowize(left / right)
             case tt.PLUS | tt.PLUS_EQUAL:
-                if isinstance(left, str) or isinstance(right, str):
-                    return str(left) + str(right)
+                if type(left) is ZSDRope:
+                    return left.concat(str(right))
+                if isinstance(left, str) or isinstance(right, (str, ZSDRope)):
+                    return concatenate(str(left), str(right))
                 if isinstance(left, (float, int)) and isinstance(right, (float, int)):
                     return shadowize(left + right)
             case tt.GREATER:
@@ -275,24 +771,15 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
 
         function = callee
 
-        arg_len = len(arguments)
-        min_arity, max_arity = function.arity()
-
-        s = lambda i: "" if i == 1 else "s"
+        message = arity_error(function, len(arguments))
+        if message:
+            raise ZSDRuntimeError(expr.paren, message)
 
-        if arg_len < min_arity:
-            raise ZSDRuntimeError(
-                expr.paren, 
-                f"Expected at least {min_arity} argument{s(min_arity)} but received {arg_len} instead."
-            )
+        try:
+            result = function.call(self, arguments)
+        except NativeError as e:
+            raise ZSDRuntimeError(expr.paren, e.message)
         
-        if arg_len > max_arity:
-            raise ZSDRuntimeError(
-                expr.paren, 
-                f"Expected at most {max_arity} argument{s(max_arity)} but received {arg_len} instead."
-            )
-
-        result = function.call(self, arguments)
         if result is NotImplemented:
             assert isinstance(function, ZSDClass)
             raise ZSDRuntimeError(expr.paren, f"Cannot instantiate class {function.name!r}.")
@@ -305,6 +792,12 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
         if isinstance(object, ZSDObject):
             return object.get(expr.name)
         
+        if isinstance(object, (str, ZSDRope)):
+            method = string_methods.get(expr.name.lexeme)
+            if method is None:
+                raise ZSDRuntimeError(expr.name, f"Undefined attribute {expr.name.lexeme!r}.")
+            return method.bind(str(object))
+        
         raise ZSDRuntimeError(expr.name, "Invalid attribute accessor.")
         
     def visit_set_expr(self, expr: Set) -> object:
@@ -343,7 +836,7 @@ class Interpreter(ExprVisitor[object], stmt.Visitor[None]):
         methods: dict[str, ZSDFunction] = {}
         for name, method in expr.methods.items():
             parameters = [ZSDParam(param.name, param.default and self.evaluate(param.default)) for param in method.params]
-            function = ZSDFunction(method, parameters, self.env, name == "init")
+            function = ZSDFunction(method, parameters, self.env, name == "init", "<object>")
             methods[name] = function
 
         instance = ZSDAnonObject(attributes, methods)
@@ -1,3 +1,5 @@
+from collections import UserString
+
 class NilType:
     def __repr__(self) -> str:
         return "nil"
@@ -32,6 +34,50 @@ class StopIterationType:
     def __repr__(self) -> str:
         return "StopIteration"
 
+# Concatenating onto a string at least this long produces a rope
+ROPE_THRESHOLD = 256
+
+class ZSDRope(UserString):
+    """
+    Lazy result of concatenating onto a long string.
+    Ropes appended to in a chain share one parts buffer, so `s += x;` in a loop
+    stays linear, the parts are only joined once the string is observed.
+    Everything else sees a regular string through UserString.
+    """
+    def __init__(self, seq: object = "", parts: list[str] | None = None) -> None:
+        if parts is None:
+            parts = [str(seq)]
+        self.parts = parts
+        # Ropes sharing the buffer may have appended past our end
+        self.count = len(parts)
+        self._flat: str | None = None
+
+    @property
+    def data(self) -> str:
+        if self._flat is None:
+            parts = self.parts
+            self._flat = "".join(parts if self.count == len(parts) else parts[:self.count])
+        return self._flat
+    
+    @data.setter
+    def data(self, value: str):
+        self.parts = [value]
+        self.count = 1
+        self._flat = value
+
+    def concat(self, other: str) -> "ZSDRope":
+        parts = self.parts
+        if self.count != len(parts):
+            # Somebody already appended to this buffer, branch off
+            parts = parts[:self.count]
+        parts.append(other)
+        return ZSDRope(parts=parts)
+
+def concatenate(left: str, right: str) -> str | ZSDRope:
+    if len(left) < ROPE_THRESHOLD:
+        return left + right
+    return ZSDRope(parts=[left, right])
+
 ZSDStopIteration = StopIterationType()
 false = FalseType()
 true = TrueType()
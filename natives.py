@@ -1,18 +1,24 @@
 from __future__ import annotations
-from itertools import chain
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Generator, Iterator
+from itertools import chain, repeat
+import mmap
+import os
 import time
+import typing
 from typing import TYPE_CHECKING, Any
 from classes import ZSDClass, ZSDNativeClass, ZSDObject, ZSDType
-from literals import ZSDStopIteration, nil
-from callables import ZSDFunction, ZSDNativeFunction
-from output import ZSDRuntimeError
+from literals import ZSDRope, ZSDStopIteration, false, nil, true
+from callables import ZSDCallable, ZSDFunction, ZSDNativeFunction, arity_error
+from output import LimitExceeded, NativeError, ZSDRuntimeError
 from zsdtoken import Token
 
 if TYPE_CHECKING:
+    from concurrent.futures import Future
     from interpreter import Interpreter
+    from tasks import Scheduler
 
 elements: list[ZSDFunction | ZSDClass] = []
-_interpreter = None
 
 def range_init(self: ZSDObject, *arguments: int):
     start = stop = 0
@@ -68,15 +74,452 @@ int_class = ZSDNativeClass(
 )
 elements.append(int_class)
 
-clock = ZSDNativeFunction((0, 0), "clock", lambda: float(format(time.perf_counter(), ".3f")))
+clock = ZSDNativeFunction((0, 0), "clock", time.perf_counter)
 elements.append(clock)
 
+clock_ns = ZSDNativeFunction((0, 0), "clockNs", time.perf_counter_ns)
+elements.append(clock_ns)
+
 def to_string_callback(value = ""):
     return str(value)
 
 to_string = ZSDNativeFunction((0, 1), "str", to_string_callback)
 elements.append(to_string)
 
+# region iterables
+
+class ZSDNativeIterable(ZSDObject, ABC):
+    """
+    An object backed by a python iterable. 
+    For-of loops and the higher-order natives consume it directly
+    instead of calling `next()` through the interpreter.
+    """
+    @abstractmethod
+    def iterate(self) -> Iterator[object]: ...
+
+def type_name(value: object) -> str:
+    klass = getattr(value, "klass", None)
+    if isinstance(klass, ZSDClass):
+        return klass.name
+    return type(value).__name__
+
+def iterate(interpreter: Interpreter, iterable: object) -> Iterator[object]:
+    """Return a python iterator over any ZSD iterable"""
+    if isinstance(iterable, ZSDNativeIterable):
+        return iterable.iterate()
+    
+    if not isinstance(iterable, ZSDObject):
+        raise NativeError(f"{type_name(iterable)!r} object is not iterable.")
+    
+    if iterable.klass is range_class:
+        fields = iterable.fields
+        start, stop, step = fields["start"], fields["stop"], fields["step"]
+        # Same values range_next() would produce, without a bound method call per step
+        if step > 0 and all(type(value) is int for value in (start, stop, step)):
+            return iter(range(start + fields["index"] * step, stop, step))
+
+    iter_func = iterable.klass.find_method("iter")
+    if iter_func is None:
+        next_func = iterable.klass.find_method("next")
+        if next_func is None:
+            raise NativeError(f"{iterable.klass.name!r} object is not iterable.")
+        iterator = iterable
+    else:
+        iterator = iter_func.bind(iterable).call(interpreter, [])
+        if isinstance(iterator, ZSDNativeIterable):
+            return iterator.iterate()
+        assert isinstance(iterator, ZSDObject)
+
+        next_func = iterator.klass.find_method("next")
+        if next_func is None:
+            raise NativeError(f"{iterator.klass.name!r} object is not an iterator.")
+
+    return _iterate_next(interpreter, next_func.bind(iterator))
+
+def _iterate_next(interpreter: Interpreter, next_func: ZSDFunction):
+    while (next_value := next_func.call(interpreter, [])) is not ZSDStopIteration:
+        yield next_value
+
+class ZSDList(ZSDNativeIterable):
+    def __init__(self, items: list[object] | None = None) -> None:
+        super().__init__(list_class)
+        self.items = items if items is not None else []
+
+    def iterate(self):
+        return iter(self.items)
+    
+    def __repr__(self) -> str:
+        return f"[{", ".join([repr(item) for item in self.items])}]"
+
+def list_init(interpreter: Interpreter, self: ZSDList, iterable: object = nil):
+    if iterable is not nil:
+        self.items = list(iterate(interpreter, iterable))
+
+def list_get(self: ZSDList, index: int):
+    try:
+        return self.items[index]
+    except (IndexError, TypeError):
+        raise NativeError(f"List index {index!r} out of range.") from None
+
+def list_push(self: ZSDList, value: object):
+    self.items.append(value)
+    return nil
+
+list_class = ZSDNativeClass(
+    "list",
+    ZSDNativeFunction((0, 1), "init", list_init, pass_interpreter=True),
+    {
+        "len": ZSDNativeFunction((0, 0), "len", lambda self: len(self.items)),
+        "get": ZSDNativeFunction((1, 1), "get", list_get),
+        "push": ZSDNativeFunction((1, 1), "push", list_push),
+        "iter": ZSDNativeFunction((0, 0), "iter", lambda self: self),
+    },
+    factory=ZSDList
+)
+elements.append(list_class)
+
+class ZSDGenerator(ZSDNativeIterable):
+    """
+    What calling a function with a yield in it returns.
+    `steps` runs the body on the python stack and stops at every yield,
+    so the function's frame and environments stay alive between two values.
+    """
+    def __init__(self, interpreter: Interpreter | None = None, steps: Iterator[object] = iter(())) -> None:
+        super().__init__(generator_class)
+        self.interpreter = interpreter
+        self.steps = steps
+        # The environment the body was in when it last yielded
+        self.env = interpreter.env if interpreter else None
+        self.running = False
+
+    def resume(self) -> object:
+        """Run the body up to its next yield, StopIteration once it's done"""
+        interpreter = self.interpreter
+        if interpreter is None:
+            return ZSDStopIteration
+
+        if self.running:
+            raise NativeError("Generator is already running.")
+
+        consumer = interpreter.env
+        interpreter.env = self.env
+        self.running = True
+        try:
+            return next(self.steps, ZSDStopIteration)
+        finally:
+            self.running = False
+            self.env = interpreter.env
+            interpreter.env = consumer
+
+    def iterate(self):
+        resume = self.resume
+        while (value := resume()) is not ZSDStopIteration:
+            yield value
+
+    def __repr__(self) -> str:
+        return "<generator>"
+
+def generator_init(self: ZSDGenerator):
+    raise NativeError("Generators are made by calling a function with a yield in it.")
+
+generator_class = ZSDNativeClass(
+    "Generator",
+    ZSDNativeFunction((0, 0), "init", generator_init),
+    {
+        "next": ZSDNativeFunction((0, 0), "next", lambda self: self.resume()),
+        "iter": ZSDNativeFunction((0, 0), "iter", lambda self: self),
+    },
+    factory=ZSDGenerator
+)
+elements.append(generator_class)
+
+# region strings
+
+class ZSDStringBuilder(ZSDObject):
+    def __init__(self) -> None:
+        super().__init__(string_builder_class)
+        self.parts: list[str] = []
+        self.length = 0
+
+    def __repr__(self) -> str:
+        return f"<StringBuilder length={self.length}>"
+
+def string_builder_init(self: ZSDStringBuilder, initial: object = ""):
+    string_builder_append(self, initial)
+
+def string_builder_append(self: ZSDStringBuilder, value: object):
+    value = str(value)
+    self.parts.append(value)
+    self.length += len(value)
+    return self
+
+def string_builder_to_string(self: ZSDStringBuilder):
+    result = "".join(self.parts)
+    # Later appends continue from the joined string
+    self.parts = [result]
+    return result
+
+def string_builder_clear(self: ZSDStringBuilder):
+    self.parts.clear()
+    self.length = 0
+    return self
+
+string_builder_class = ZSDNativeClass(
+    "StringBuilder",
+    ZSDNativeFunction((0, 1), "init", string_builder_init),
+    {
+        "append": ZSDNativeFunction((1, 1), "append", string_builder_append),
+        "toString": ZSDNativeFunction((0, 0), "toString", string_builder_to_string),
+        "len": ZSDNativeFunction((0, 0), "len", lambda self: self.length),
+        "clear": ZSDNativeFunction((0, 0), "clear", string_builder_clear),
+    },
+    factory=ZSDStringBuilder
+)
+elements.append(string_builder_class)
+
+# Methods available on every string, `this` is the python str.
+# They work on the str directly, so no per-character loop ever runs in ZSD.
+
+def check_type(value: object, expected: type | tuple[type, ...], what: str):
+    if not isinstance(value, expected):
+        raise NativeError(f"Expected {what}, got {type_name(value)!r}.")
+    return value
+
+def check_string(value: object, what: str = "a string") -> str:
+    """Strings and the ropes concatenation makes are the same thing to a native"""
+    return str(check_type(value, (str, ZSDRope), what))
+
+def check_index(value: object, what: str) -> int:
+    """Division always makes a float, so a float with nothing after the point is an index too"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, float):
+        raise NativeError(f"Expected {what}, got {value!r}.")
+    return check_type(value, int, what)
+
+def string_slice(self: str, start: object, stop: object = nil):
+    start = check_index(start, "an integer start index")
+    if stop is nil:
+        return self[start:]
+    return self[start:check_index(stop, "an integer stop index")]
+
+def string_find(self: str, substring: str, start: object = 0):
+    return self.find(check_string(substring), check_index(start, "an integer start index"))
+
+def string_split(self: str, separator: object = nil):
+    if separator is nil:
+        return ZSDList(list(self.split()))
+    separator = check_string(separator, "a string separator")
+    if not separator:
+        raise NativeError("Empty separator.")
+    return ZSDList(list(self.split(separator)))
+
+def string_replace(self: str, old: str, new: object):
+    return self.replace(check_string(old), str(new))
+
+def string_starts_with(self: str, prefix: str):
+    return true if self.startswith(check_string(prefix)) else false
+
+def string_ends_with(self: str, suffix: str):
+    return true if self.endswith(check_string(suffix)) else false
+
+string_methods: dict[str, ZSDNativeFunction] = {
+    "len": ZSDNativeFunction((0, 0), "len", len),
+    "slice": ZSDNativeFunction((1, 2), "slice", string_slice),
+    "find": ZSDNativeFunction((1, 2), "find", string_find),
+    "split": ZSDNativeFunction((0, 1), "split", string_split),
+    "replace": ZSDNativeFunction((2, 2), "replace", string_replace),
+    "startsWith": ZSDNativeFunction((1, 1), "startsWith", string_starts_with),
+    "endsWith": ZSDNativeFunction((1, 1), "endsWith", string_ends_with),
+    "upper": ZSDNativeFunction((0, 0), "upper", str.upper),
+    "lower": ZSDNativeFunction((0, 0), "lower", str.lower),
+    "strip": ZSDNativeFunction((0, 0), "strip", str.strip),
+    "lines": ZSDNativeFunction((0, 0), "lines", lambda self: ZSDList(self.splitlines())),
+}
+
+# region files
+
+# Line iteration reads the file in chunks of this size, never as a whole
+READ_BUFFER_SIZE = 1 << 16
+
+def open_file(path: object, mode: str = "r"):
+    path = check_string(path, "a string path")
+    try:
+        if mode == "r":
+            return open(path, mode, encoding="utf-8", buffering=READ_BUFFER_SIZE)
+        return open(path, mode)
+    except OSError as e:
+        raise NativeError(f"Cannot open {path!r}: {e.strerror}.") from None
+
+def map_file(path: object) -> mmap.mmap | None:
+    with open_file(path, "rb") as file:
+        # Empty files cannot be mapped
+        if not file.seek(0, 2):
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class ZSDFileLines(ZSDNativeIterable):
+    """Lines of a file, streamed every time it is iterated"""
+    def __init__(self, path: str) -> None:
+        super().__init__(file_lines_class)
+        self.path = path
+
+    def iterate(self):
+        # Open eagerly so a missing file is reported at the loop, not halfway through
+        return self._iterate(open_file(self.path))
+
+    def _iterate(self, file):
+        with file:
+            try:
+                for line in file:
+                    yield line.removesuffix("\n")
+            except UnicodeDecodeError:
+                raise NativeError(f"Invalid UTF-8 in {self.path!r}.") from None
+            except OSError as e:
+                raise NativeError(f"Cannot read {self.path!r}: {e.strerror}.") from None
+
+    def __repr__(self) -> str:
+        return f"<lines of {self.path!r}>"
+
+file_lines_class = ZSDNativeClass(
+    "lines",
+    ZSDNativeFunction((1, 1), "init", lambda self, path: setattr(self, "path", check_string(path, "a string path"))),
+    {"iter": ZSDNativeFunction((0, 0), "iter", lambda self: self)},
+    factory=lambda: ZSDFileLines("")
+)
+elements.append(file_lines_class)
+
+class ZSDBytes(ZSDNativeIterable):
+    """Read-only bytes, usually a memory mapped file that is paged in on access"""
+    def __init__(self, data: bytes | mmap.mmap = b"") -> None:
+        super().__init__(bytes_class)
+        self.data = memoryview(data)
+
+    def iterate(self):
+        return iter(self.data)
+    
+    def __repr__(self) -> str:
+        return f"<bytes length={len(self.data)}>"
+
+def bytes_get(self: ZSDBytes, index: int):
+    try:
+        return self.data[check_type(index, int, "an integer index")]
+    except IndexError:
+        raise NativeError(f"Bytes index {index!r} out of range.") from None
+
+def bytes_slice(self: ZSDBytes, start: int, stop: object = nil):
+    check_type(start, int, "an integer start index")
+    stop = len(self.data) if stop is nil else check_type(stop, int, "an integer stop index")
+    result = ZSDBytes()
+    result.data = self.data[start:stop]
+    return result
+
+def bytes_decode(self: ZSDBytes):
+    try:
+        return str(self.data, "utf-8")
+    except UnicodeDecodeError as e:
+        raise NativeError(f"Invalid UTF-8 at byte {e.start}.") from None
+
+bytes_class = ZSDNativeClass(
+    "bytes",
+    ZSDNativeFunction((0, 0), "init", lambda self: None),
+    {
+        "len": ZSDNativeFunction((0, 0), "len", lambda self: len(self.data)),
+        "get": ZSDNativeFunction((1, 1), "get", bytes_get),
+        "slice": ZSDNativeFunction((1, 2), "slice", bytes_slice),
+        "decode": ZSDNativeFunction((0, 0), "decode", bytes_decode),
+        "iter": ZSDNativeFunction((0, 0), "iter", lambda self: self),
+    },
+    factory=ZSDBytes
+)
+elements.append(bytes_class)
+
+def read_bytes(path: object):
+    mapped = map_file(path)
+    return ZSDBytes(mapped) if mapped is not None else ZSDBytes()
+
+def read_text(path: object):
+    mapped = map_file(path)
+    if mapped is None:
+        return ""
+    # Decoding straight from the mapping skips the intermediate bytes copy
+    with mapped:
+        try:
+            return str(mapped, "utf-8")
+        except UnicodeDecodeError as e:
+            raise NativeError(f"Invalid UTF-8 in {path!r} at byte {e.start}.") from None
+
+elements.append(ZSDNativeFunction((1, 1), "readBytes", read_bytes))
+elements.append(ZSDNativeFunction((1, 1), "readText", read_text))
+
+# region higher-order
+
+# These validate the callee once and then drive it with call_many(),
+# which is a lot cheaper than a for-of loop calling it N times
+
+def check_callable(function: object) -> ZSDCallable:
+    if not isinstance(function, ZSDCallable):
+        raise NativeError(f"{type_name(function)!r} object is not callable.")
+    return function
+
+def map_callback(interpreter: Interpreter, function: object, iterable: object):
+    items = iterate(interpreter, iterable)
+    results = check_callable(function).call_many(interpreter, ([item] for item in items), 1)
+    return ZSDList(list(results))
+
+def filter_callback(interpreter: Interpreter, function: object, iterable: object):
+    items = list(iterate(interpreter, iterable))
+    keep = check_callable(function).call_many(interpreter, ([item] for item in items), 1)
+    return ZSDList([item for item, kept in zip(items, keep) if kept])
+
+def reduce_callback(interpreter: Interpreter, function: object, iterable: object, *initial: object):
+    items = iterate(interpreter, iterable)
+
+    if initial:
+        accumulator, = initial
+    else:
+        accumulator = next(items, ZSDStopIteration)
+        if accumulator is ZSDStopIteration:
+            raise NativeError("reduce() of an empty iterable with no initial value.")
+
+    # call_many is lazy, so every argument list sees the previous result
+    def argument_lists():
+        for item in items:
+            yield [accumulator, item]
+
+    for accumulator in check_callable(function).call_many(interpreter, argument_lists(), 2):
+        pass
+
+    return accumulator
+
+def each_callback(interpreter: Interpreter, function: object, iterable: object):
+    items = iterate(interpreter, iterable)
+    for _ in check_callable(function).call_many(interpreter, ([item] for item in items), 1):
+        pass
+    return nil
+
+elements.append(ZSDNativeFunction((2, 2), "map", map_callback, pass_interpreter=True))
+elements.append(ZSDNativeFunction((2, 2), "filter", filter_callback, pass_interpreter=True))
+elements.append(ZSDNativeFunction((2, 3), "reduce", reduce_callback, pass_interpreter=True))
+elements.append(ZSDNativeFunction((2, 2), "each", each_callback, pass_interpreter=True))
+
+def parallel_map_callback(interpreter: Interpreter, function: object, iterable: object, workers: object = nil):
+    """map() in worker processes, see parallel.py for what the function may do"""
+    import parallel
+    if type(function) is not ZSDFunction:
+        raise NativeError(f"parallelMap() needs a ZSD function, got {type_name(function)!r}.")
+    if workers is nil:
+        workers = os.cpu_count() or 1
+    elif type(workers) is not int or workers < 1:
+        raise NativeError("Expected a positive integer worker count.")
+
+    items = list(iterate(interpreter, iterable))
+    return ZSDList(parallel.parallel_map(interpreter, function, items, workers))
+
+elements.append(ZSDNativeFunction((2, 3), "parallelMap", parallel_map_callback, pass_interpreter=True))
+
+# region objects
+
 class ZSDAnonObject(ZSDObject):
     def __init__(self, attributes: dict[str, Any], methods: dict[str, ZSDFunction]) -> None:
         super().__init__(ZSDType, attributes)
@@ -109,15 +552,177 @@ class ZSDAnonObject(ZSDObject):
         ])
         return f"<Object{attributes}>"
     
+# region runtime
+
+def stats_callback(interpreter: Interpreter):
+    snapshot = interpreter.stats()
+    if snapshot is None:
+        return nil
+    
+    allocations = typing.cast("dict[str, int]", snapshot.pop("allocations"))
+    return ZSDAnonObject(snapshot | {"allocations": ZSDAnonObject(allocations, {})}, {})
+
+elements.append(ZSDNativeFunction((0, 0), "stats", stats_callback, pass_interpreter=True))
+
+def bench_callback(interpreter: Interpreter, function: object, iterations: int, warmup: object = nil):
+    """Time `iterations` calls of a function without arguments, after some untimed ones"""
+    check_type(iterations, int, "an integer iteration count")
+    if iterations < 1:
+        raise NativeError("bench() needs at least one iteration.")
+    warmup = max(1, iterations // 10) if warmup is nil else max(0, check_type(warmup, int, "an integer warmup count"))
+
+    calls = check_callable(function).call_many(interpreter, repeat([], iterations + warmup), 0)
+    for _ in range(warmup):
+        next(calls)
+
+    clock = time.perf_counter_ns
+    samples: list[int] = []
+    for _ in range(iterations):
+        start = clock()
+        next(calls)
+        samples.append(clock() - start)
+
+    import statistics
+    seconds = [sample / 1e9 for sample in samples]
+    return ZSDAnonObject({
+        "iterations": iterations,
+        "min": min(seconds),
+        "median": statistics.median(seconds),
+        "mean": statistics.fmean(seconds),
+        "stddev": statistics.stdev(seconds) if iterations > 1 else 0.0,
+    }, {})
+
+elements.append(ZSDNativeFunction((2, 3), "bench", bench_callback, pass_interpreter=True))
+
+def flush_callback(interpreter: Interpreter):
+    interpreter.flush()
+    return nil
+
+elements.append(ZSDNativeFunction((0, 0), "flush", flush_callback, pass_interpreter=True))
+
+# region tasks
+
+class ZSDTask(ZSDObject):
+    """A spawned function, a timer or a background read, see tasks.py"""
+    def __init__(self, start: Callable[[], Generator[ZSDTask, None, None]] | None = None) -> None:
+        super().__init__(task_class)
+        # Spawned tasks start when the scheduler gets to them in the run queue
+        self.start = start
+        self.done = False
+        self.result: object = nil
+        self.error: Exception | None = None
+        # Called when the task finishes, to put the coroutines awaiting it back in the run queue
+        self.waiters: list[Callable[[], None]] = []
+
+    def finish(self, result: object = nil, error: Exception | None = None):
+        self.done = True
+        self.result = result
+        self.error = error
+        waiters, self.waiters = self.waiters, []
+        for wake in waiters:
+            wake()
+
+    def run(self) -> Generator[ZSDTask, None, None]:
+        start, self.start = self.start, None
+        if start is not None:
+            yield from start()
+
+    def __repr__(self) -> str:
+        state = "failed" if self.error else "done" if self.done else "pending" if self.start else "running"
+        return f"<Task {state}>"
+
+task_class = ZSDNativeClass(
+    "Task",
+    ZSDNativeFunction((0, 0), "init", lambda self: None),
+    {
+        "done": ZSDNativeFunction((0, 0), "done", lambda self: true if self.done else false),
+    },
+    factory=ZSDTask
+)
+elements.append(task_class)
+
+DEADLOCK = "await() would wait forever, the task is waiting on this one."
+
+def scheduler_of(interpreter: Interpreter) -> Scheduler:
+    if interpreter.scheduler is None:
+        from tasks import Scheduler
+        interpreter.scheduler = Scheduler(interpreter)
+    return interpreter.scheduler
+
+def spawn_callback(interpreter: Interpreter, function: object):
+    function = check_callable(function)
+    message = arity_error(function, 0)
+    if message:
+        raise NativeError(message)
+
+    def start():
+        try:
+            task.finish((yield from interpreter.coroutine(function, [])))
+        except LimitExceeded:
+            # A sandbox limit stops the whole program, not just this task
+            raise
+        except ZSDRuntimeError as e:
+            task.finish(error=e)
+            scheduler.unhandled.append(e)
+        except NativeError as e:
+            task.finish(error=e)
+
+    task = ZSDTask(start)
+    scheduler = scheduler_of(interpreter)
+    scheduler.spawn(task.run)
+    return task
+
+def sleep_callback(interpreter: Interpreter, seconds: object):
+    check_type(seconds, (int, float), "a number of seconds")
+    task = ZSDTask()
+    scheduler_of(interpreter).call_later(typing.cast(float, seconds), task.finish)
+    return task
+
+def read_text_async(interpreter: Interpreter, path: object):
+    path = check_string(path, "a string path")
+    task = ZSDTask()
+
+    def finished(future: Future[str]):
+        error = future.exception()
+        if error is None:
+            task.finish(future.result())
+        else:
+            task.finish(error=error if isinstance(error, NativeError) else NativeError(str(error)))
+
+    scheduler_of(interpreter).run_in_background(lambda: read_text(path), finished)
+    return task
+
+def await_callback(interpreter: Interpreter, task: object):
+    """
+    An await a task can't suspend in, like one in the script's top level, runs the other tasks until this one is done.
+    Tasks suspend in Interpreter.suspend_call() instead.
+    """
+    check_type(task, ZSDTask, "a task")
+    task = typing.cast(ZSDTask, task)
+    if not task.done and not scheduler_of(interpreter).wait(task):
+        raise NativeError(DEADLOCK)
+    return task_result(interpreter, task)
+
+def task_result(interpreter: Interpreter, task: ZSDTask) -> object:
+    """What awaiting a finished task gives, a failed task's error counts as handled from then on"""
+    if task.error is not None:
+        if task.error in interpreter.scheduler.unhandled:
+            interpreter.scheduler.unhandled.remove(task.error)
+        raise task.error
+    return task.result
+
+elements.append(ZSDNativeFunction((1, 1), "spawn", spawn_callback, pass_interpreter=True))
+elements.append(ZSDNativeFunction((1, 1), "sleep", sleep_callback, pass_interpreter=True))
+elements.append(ZSDNativeFunction((1, 1), "readTextAsync", read_text_async, pass_interpreter=True))
+await_function = ZSDNativeFunction((1, 1), "await", await_callback, pass_interpreter=True)
+elements.append(await_function)
+
 # region meta
 
+# The initial global environment, built once and copied into every interpreter
+initial_globals: dict[str, object] = {elem.name: elem for elem in elements}
+initial_globals["StopIteration"] = ZSDStopIteration
+
 def inject(interpreter: Interpreter):
-    global _interpreter
-    _interpreter = interpreter
-    for elem in elements:
-        interpreter.globals.define(elem.name, elem)
-
-def request_interpreter():
-    if _interpreter is None:
-        raise ValueError("Attempted to access interpreter before initialization.")
-    return _interpreter
\ No newline at end of file
+    interpreter.globals.values.update(initial_globals)
+
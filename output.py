@@ -20,6 +20,16 @@ class ReturnException(ZSDRuntimeError):
         self.message = "Return statement outside function."
         super().__init__(self.return_stmt.keyword, self.message)
 
+class LimitExceeded(ZSDRuntimeError):
+    """A step budget, deadline or call depth set with Interpreter.set_limits() ran out"""
+
+class NativeError(RuntimeError):
+    """Raised by native callbacks, which have no token to report at.
+    The call expression that invoked the native turns it into a ZSDRuntimeError."""
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
 class ParseError(ValueError): pass
 class ExpectedExpression(ParseError):
     def __init__(self, token: Token) -> None:
@@ -27,36 +37,86 @@ class ExpectedExpression(ParseError):
         self.message = "Expected expression."
         super().__init__(self.message)
 
+class CompileError(ValueError):
+    """A source given to program.compile() had errors, `message` holds the reports"""
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
 MAX_ARGUMENTS: Final = 255
-stream = sys.stdout
-had_error = False
-had_runtime_error = False
+# Characters a BufferedStream holds before writing them out
+OUTPUT_BUFFER_SIZE: Final = 64 * 1024
+
+class Reporter:
+    """
+    Error state of one interpreter, and the stream its errors go to.
+    Without a stream they go to whatever sys.stdout is at the time.
+    `output` is where the interpreter prints, it's flushed before every report
+    so an error never shows up ahead of what was printed before it.
+    """
+    def __init__(self, stream: "SupportsWrite[str] | None" = None, output: "SupportsWrite[str] | None" = None) -> None:
+        self.stream = stream
+        self.output = output
+        self.had_error = False
+        self.had_runtime_error = False
+
+    def report(self, line: int, where: str, message: str):
+        self.had_error = True
+        self.write(f"[Line {line}] Error{where}: {message}")
+
+    def runtime_error(self, error: ZSDRuntimeError):
+        self.had_runtime_error = True
+        self.write(f"[Line {error.token.line}] at {error.token.lexeme!r}: {error.message}")
 
-def report(line: int, where: str, message: str):
-    global had_error
-    had_error = True
-    print(f"[Line {line}] Error{where}: {message}", file=stream)
+    def write(self, text: str):
+        if self.output is not None and self.output is not self.stream:
+            flush(self.output)
+        stream = self.stream or sys.stdout
+        print(text, file=stream)
+        flush(stream)
 
-def runtime_error(error: ZSDRuntimeError):
-    global had_runtime_error
-    had_runtime_error = True
-    print(f"[Line {error.token.line}] at {error.token.lexeme!r}: {error.message}", file=stream)
+    def errorline(self, line: int, message: str):
+        self.report(line, "", message)
 
+    def error(self, token: Token, message: str):
+        if token.type == tt.EOF:
+            self.report(token.line, " at the end", message)
+        else:
+            self.report(token.line, f" at {token.lexeme!r}", message)
 
-def errorline(line: int, message: str):
-    report(line, "", message)
+    def reset(self):
+        self.had_error, self.had_runtime_error = False, False
 
-def error(token: Token, message: str):
-    if token.type == tt.EOF:
-        report(token.line, " at the end", message)
-    else:
-        report(token.line, f" at {token.lexeme!r}", message)
+def flush(stream: object):
+    """Flush a stream if it can be, SupportsWrite doesn't promise a flush()"""
+    flush = getattr(stream, "flush", None)
+    if flush is not None:
+        flush()
 
+class BufferedStream:
+    """
+    Collects what's written to it and passes it on to `target` in blocks of about `size` characters,
+    so a script printing line after line costs one write per block instead of one per print.
+    Without a target the blocks go to whatever sys.stdout is at the time.
+    """
+    def __init__(self, target: "SupportsWrite[str] | None" = None, size: int = OUTPUT_BUFFER_SIZE) -> None:
+        self.target = target
+        self.size = size
+        self.parts: list[str] = []
+        self.buffered = 0
 
-def reset():
-    global had_error, had_runtime_error
-    had_error, had_runtime_error = False, False
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.size:
+            self.flush()
+        return len(text)
 
-def set_stream(writable_stream: "SupportsWrite[str]"):
-    global stream
-    stream = writable_stream
\ No newline at end of file
+    def flush(self):
+        target = self.target or sys.stdout
+        if self.parts:
+            text = "".join(self.parts)
+            self.parts.clear()
+            self.buffered = 0
+            target.write(text)
+        flush(target)
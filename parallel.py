@@ -0,0 +1,307 @@
+"""
+parallelMap(): a pure ZSD function mapped over a list by forked worker processes.
+
+Only the function's declaration and the values it captures are sent to the workers,
+pickled the same way as heap images. Functions and classes it captures are checked and sent along.
+To give the same results as a plain map(), the function can't print, can't assign to variables
+outside of itself and can't capture anything mutable, and the natives it reaches must be in PURE_NATIVES.
+The items are checked and sent the same way, a function among them is held to the same rules.
+"""
+from __future__ import annotations
+from collections.abc import Mapping
+import io
+import multiprocessing
+from typing import TYPE_CHECKING
+from callables import ZSDFunction, ZSDParam, arity_error
+from classes import ZSDClass, ZSDType
+from environment import Environment
+from expr import AnonObject, Assign, Expr, Super, This, Variable
+from image import ImagePickler, ImageUnpickler
+from literals import ZSDRope, ZSDStopIteration, false, nil, true
+import natives
+from output import NativeError, ZSDRuntimeError
+import stmt
+
+if TYPE_CHECKING:
+    from interpreter import Interpreter
+
+# Natives whose result only depends on their arguments
+PURE_NATIVES = frozenset({
+    "range", "int", "str", "list", "StringBuilder", "bytes", "Generator",
+    "map", "filter", "reduce", "each", "StopIteration",
+})
+# More chunks than workers, so one slow chunk doesn't leave the others idle
+CHUNKS_PER_WORKER = 4
+
+class Scan:
+    """
+    The names a function reads and assigns outside of itself.
+    Walks the body with the same scopes the resolver uses, and collects
+    the resolved distances of every expression on the way.
+    """
+    def __init__(self, locals: Mapping[Expr, int]) -> None:
+        self.locals = locals
+        self.found: dict[Expr, int] = {}
+        self.scopes: list[set[str]] = []
+        self.free: set[str] = set()
+        self.assigned: set[str] = set()
+
+    def function(self, declaration: stmt.Function, outer: set[str] | None = None):
+        if outer is not None:
+            self.scopes.append(outer)
+        self.scopes.append({param.name.lexeme for param in declaration.params})
+        self.walk(declaration.body.statements)
+        self.scopes.pop()
+        if outer is not None:
+            self.scopes.pop()
+
+    def declare(self, name: str):
+        if self.scopes:
+            self.scopes[-1].add(name)
+
+    def reference(self, name: str, assigned: bool = False):
+        if any(name in scope for scope in self.scopes):
+            return
+        self.free.add(name)
+        if assigned:
+            self.assigned.add(name)
+
+    def walk(self, node: object):
+        if isinstance(node, Expr) and node in self.locals:
+            self.found[node] = self.locals[node]
+
+        match node:
+            case list() | tuple():
+                for child in node:
+                    self.walk(child)
+            case stmt.Print():
+                raise NativeError("parallelMap() can't run a function that prints, the workers would print in any order.")
+            case stmt.Var():
+                self.walk(node.initializer)
+                self.declare(node.name.lexeme)
+            case stmt.Function():
+                self.declare(node.name.lexeme)
+                self.walk([param.default for param in node.params])
+                self.function(node)
+            case stmt.Class():
+                self.declare(node.name.lexeme)
+                self.walk(node.superclass)
+                for method in node.methods:
+                    self.walk([param.default for param in method.params])
+                    self.function(method, {"this", "super"})
+            case stmt.Block():
+                self.scopes.append(set())
+                self.walk(node.statements)
+                self.scopes.pop()
+            case stmt.For():
+                self.walk(node.iterable)
+                self.scopes.append({node.iter_var.lexeme})
+                self.walk(node.body)
+                self.scopes.pop()
+            case AnonObject():
+                self.walk(list(node.attributes.values()))
+                for method in node.methods.values():
+                    self.walk([param.default for param in method.params])
+                    self.function(method, {"this"})
+            case Variable():
+                self.reference(node.name.lexeme)
+            case Assign():
+                self.walk(node.value)
+                self.reference(node.name.lexeme, assigned=True)
+            case This():
+                self.reference("this")
+            case Super():
+                self.reference("super")
+                self.reference("this")
+            case stmt.Stmt() | Expr():
+                self.walk(list(vars(node).values()))
+
+class Shipment:
+    """Copies of a function and everything it captures, cut off from the rest of the heap"""
+    def __init__(self, interpreter: Interpreter) -> None:
+        self.interpreter = interpreter
+        self.globals: dict[str, object] = {}
+        self.locals: dict[Expr, int] = {}
+        # Stands in for the globals at the end of every copied closure, the workers look globals up by name
+        self.root = Environment()
+        self.copies: dict[int, object] = {}
+        # Copies in the order they were made, results that refer to them get the originals back
+        self.originals: list[object] = []
+        self.shipped: list[object] = []
+        self.pure = {id(natives.initial_globals[name]) for name in PURE_NATIVES}
+
+    def remember(self, original: object, copy: object):
+        self.copies[id(original)] = copy
+        self.originals.append(original)
+        self.shipped.append(copy)
+
+    def value(self, name: str, value: object) -> object:
+        if any(value is literal for literal in (nil, true, false, ZSDStopIteration, ZSDType)) or type(value) in (int, float, str):
+            return value
+        if type(value) is ZSDRope:
+            return str(value)
+        if id(value) in self.pure:
+            return value
+
+        copy = self.copies.get(id(value))
+        if copy is not None:
+            return copy
+        if type(value) is ZSDFunction:
+            return self.function(value)
+        if type(value) is ZSDClass:
+            return self.klass(name, value)
+        if any(value is native for native in natives.initial_globals.values()):
+            raise NativeError(f"parallelMap() can't run a function that uses {name!r}, its result depends on more than its arguments.")
+        raise NativeError(f"parallelMap() can't send {name!r} to the workers, it's a mutable {natives.type_name(value)!r} object.")
+
+    def item(self, index: int, value: object) -> object:
+        return self.value(f"item {index}", value)
+
+    def function(self, function: ZSDFunction) -> ZSDFunction:
+        copy = ZSDFunction(function.declaration, [], self.root, function.is_init, function.owner)
+        copy.name = function.name
+        self.remember(function, copy)
+
+        copy.parameters = [
+            ZSDParam(param.name, None if param.default is None else self.value(param.name.lexeme, param.default))
+            for param in function.parameters
+        ]
+
+        scan = Scan(self.interpreter.locals)
+        scan.function(function.declaration)
+        if scan.assigned:
+            name = min(scan.assigned)
+            raise NativeError(f"parallelMap() can't run a function that assigns to {name!r} outside of itself.")
+        self.locals.update(scan.found)
+
+        copy.closure = self.closure(function.closure, scan.free)
+        return copy
+
+    def klass(self, name: str, klass: ZSDClass) -> ZSDClass:
+        if klass.fields.keys() != {"__class__"}:
+            raise NativeError(f"parallelMap() can't send class {name!r} to the workers, it has mutable attributes.")
+
+        copy = ZSDClass(klass.name, {})
+        self.remember(klass, copy)
+        superclass = self.value("super", klass.superclass)
+        if not isinstance(superclass, ZSDClass):
+            raise NativeError(f"parallelMap() can't send class {name!r} to the workers, its superclass can't go along.")
+        copy.superclass = superclass
+        copy.methods = {method_name: self.function(method) for method_name, method in klass.methods.items()}
+        return copy
+
+    def closure(self, env: Environment, names: set[str]) -> Environment:
+        """
+        A chain as deep as `env` up to the globals, holding only `names`,
+        so the resolved distances in the function still line up.
+        """
+        globals = self.interpreter.globals
+        levels: list[Environment] = []
+        remaining = set(names)
+
+        while env is not globals and env is not None:
+            level = Environment()
+            for name in sorted(remaining & env.values.keys()):
+                level.values[name] = self.value(name, env.values[name])
+            remaining -= level.values.keys()
+            levels.append(level)
+            env = env.parent_scope
+
+        for name in sorted(remaining):
+            if name in globals.values and name not in self.globals:
+                self.globals[name] = self.value(name, globals.values[name])
+
+        parent = self.root
+        for level in reversed(levels):
+            level.parent_scope = parent
+            parent = level
+        return parent
+
+class ResultPickler(ImagePickler):
+    """Results that refer to a shipped function or class get the original back in the parent"""
+    def __init__(self, file: io.BytesIO, shipped: list[object]) -> None:
+        super().__init__(file)
+        self.shipped = {id(copy): index for index, copy in enumerate(shipped)}
+
+    def persistent_id(self, obj: object):
+        index = self.shipped.get(id(obj))
+        if index is not None:
+            return f"shipped:{index}"
+        return super().persistent_id(obj)
+
+class ResultUnpickler(ImageUnpickler):
+    def __init__(self, file: io.BytesIO, originals: list[object]) -> None:
+        super().__init__(file)
+        self.originals = originals
+
+    def persistent_load(self, pid: str | tuple[str, object]):
+        if isinstance(pid, str) and pid.startswith("shipped:"):
+            return self.originals[int(pid.removeprefix("shipped:"))]
+        return super().persistent_load(pid)
+
+def dumps(value: object) -> bytes:
+    file = io.BytesIO()
+    ImagePickler(file).dump(value)
+    return file.getvalue()
+
+# The payload a worker unpickled last, every chunk of one call carries the same one
+_loaded: tuple[bytes, Interpreter, ZSDFunction, list[object]] | None = None
+
+def run_chunk(payload: bytes, chunk: bytes) -> bytes:
+    """Runs in a worker, maps the function over one pickled chunk of the items"""
+    global _loaded
+    if _loaded is None or _loaded[0] != payload:
+        from interpreter import Interpreter
+        function, globals, locals, shipped = ImageUnpickler(io.BytesIO(payload)).load()
+        interpreter = Interpreter()
+        natives.inject(interpreter)
+        interpreter.globals.values.update(globals)
+        interpreter.own_locals().update(locals)
+        _loaded = (payload, interpreter, function, shipped)
+
+    _, interpreter, function, shipped = _loaded
+    items = ResultUnpickler(io.BytesIO(chunk), shipped).load()
+    try:
+        result: object = ("ok", list(function.call_many(interpreter, ([item] for item in items), 1)))
+    except ZSDRuntimeError as e:
+        result = ("error", f"[Line {e.token.line}] {e.message}")
+    except NativeError as e:
+        result = ("error", e.message)
+
+    file = io.BytesIO()
+    ResultPickler(file, shipped).dump(result)
+    return file.getvalue()
+
+def parallel_map(interpreter: Interpreter, function: ZSDFunction, items: list[object], workers: int) -> list[object]:
+    if function.declaration.yielding:
+        raise NativeError("parallelMap() can't run a generator.")
+    message = arity_error(function, 1)
+    if message:
+        raise NativeError(message)
+
+    shipment = Shipment(interpreter)
+    copy = shipment.function(function)
+    shipped_items = [shipment.item(index, item) for index, item in enumerate(items)]
+    if workers == 1 or len(items) <= 1:
+        # Checked all the same, so a function doesn't pass only while the input is small
+        return list(function.call_many(interpreter, ([item] for item in items), 1))
+
+    payload = dumps((copy, shipment.globals, shipment.locals, shipment.shipped))
+    size = -(-len(items) // (workers * CHUNKS_PER_WORKER))
+    chunks: list[bytes] = []
+    for start in range(0, len(items), size):
+        # Shipped functions among the items are the ones in the payload, results that refer to them map back too
+        file = io.BytesIO()
+        ResultPickler(file, shipment.shipped).dump(shipped_items[start:start + size])
+        chunks.append(file.getvalue())
+
+    with multiprocessing.get_context("fork").Pool(min(workers, len(chunks))) as pool:
+        answers = pool.starmap(run_chunk, [(payload, chunk) for chunk in chunks])
+
+    results: list[object] = []
+    for answer in answers:
+        status, value = ResultUnpickler(io.BytesIO(answer), shipment.originals).load()
+        if status == "error":
+            raise NativeError(f"In a parallelMap() worker: {value}")
+        results.extend(value)
+    return results
@@ -0,0 +1,377 @@
+from __future__ import annotations
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass, field
+import json
+import marshal
+import sys
+import threading
+import time
+from types import FrameType
+from typing import TYPE_CHECKING, TextIO
+from callables import ZSDFunction, ZSDNativeFunction
+from expr import AnonObject, Expr
+from zsdtoken import Token
+import stmt
+
+if TYPE_CHECKING:
+    from environment import Environment
+    from interpreter import Interpreter
+
+@dataclass
+class FunctionStats:
+    label: str
+    line: int
+    calls: int = 0
+    # Calls that weren't recursive, cProfile calls these primitive
+    primitive_calls: int = 0
+    self_time: float = 0.0
+    cumulative: float = 0.0
+    # {caller: [calls, primitive_calls, self_time, cumulative]}
+    callers: dict[stmt.Function | None, list] = field(default_factory=dict)
+
+def function_label(function: ZSDFunction):
+    name = function.declaration.name.lexeme
+    return f"{function.owner}.{name}" if function.owner else name
+
+class Profiler:
+    """
+    Deterministic profiler for ZSD functions and methods.
+    It replaces Interpreter.call_function() on the instance it profiles,
+    an interpreter without a profiler runs the plain method.
+    """
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.stats: dict[stmt.Function, FunctionStats] = {}
+        # Self time per call stack, for flame graphs
+        self.stacks: dict[tuple[str, ...], float] = {}
+        # [declaration, start, time spent in callees]
+        self.frames: list[list] = []
+        self.labels: list[str] = []
+        self.active: dict[stmt.Function, int] = {}
+
+    def install(self, interpreter: Interpreter):
+        interpreter.add_hook(self, "call_function", self.wrap)
+
+    def uninstall(self, interpreter: Interpreter):
+        interpreter.remove_hooks(self)
+
+    def wrap(self, original: Callable[[ZSDFunction, Environment], object]):
+        clock = self.clock
+        stats = self.stats
+        stacks = self.stacks
+        frames = self.frames
+        labels = self.labels
+        active = self.active
+
+        def call_function(function: ZSDFunction, env: Environment) -> object:
+            declaration = function.declaration
+            entry = stats.get(declaration)
+            if entry is None:
+                entry = stats[declaration] = FunctionStats(function_label(function), declaration.name.line)
+
+            recursive = active.get(declaration, 0)
+            active[declaration] = recursive + 1
+            labels.append(entry.label)
+            frame = [declaration, clock(), 0.0]
+            frames.append(frame)
+
+            try:
+                return original(function, env)
+            finally:
+                elapsed = clock() - frame[1]
+                self_time = elapsed - frame[2]
+                path = tuple(labels)
+                frames.pop()
+                labels.pop()
+                active[declaration] = recursive
+
+                entry.calls += 1
+                entry.self_time += self_time
+                if not recursive:
+                    entry.primitive_calls += 1
+                    entry.cumulative += elapsed
+
+                caller = None
+                if frames:
+                    frames[-1][2] += elapsed
+                    caller = frames[-1][0]
+
+                edge = entry.callers.get(caller)
+                if edge is None:
+                    edge = entry.callers[caller] = [0, 0, 0.0, 0.0]
+                edge[0] += 1
+                edge[2] += self_time
+                if not recursive:
+                    edge[1] += 1
+                    edge[3] += elapsed
+
+                stacks[path] = stacks.get(path, 0.0) + self_time
+
+        return call_function
+
+    # region reports
+
+    def print_report(self, stream: TextIO = sys.stderr, sort: str = "cumulative", limit: int | None = None):
+        entries = sorted(self.stats.values(), key=lambda entry: getattr(entry, sort), reverse=True)
+        total_calls = sum(entry.calls for entry in entries)
+
+        print(f"{total_calls} ZSD function calls", file=stream)
+        print(f"{"ncalls":>12} {"tottime":>10} {"percall":>10} {"cumtime":>10} {"percall":>10}  function (line)", file=stream)
+
+        for entry in entries[:limit]:
+            calls = str(entry.calls)
+            if entry.primitive_calls != entry.calls:
+                calls += f"/{entry.primitive_calls}"
+
+            print(
+                f"{calls:>12} {entry.self_time:>10.6f} {entry.self_time / entry.calls:>10.6f}"
+                f" {entry.cumulative:>10.6f} {entry.cumulative / max(entry.primitive_calls, 1):>10.6f}"
+                f"  {entry.label} (line {entry.line})",
+                file=stream
+            )
+
+    def dump_stats(self, path: str, filename: str = "<zsd>"):
+        """Write the stats in the marshal format pstats.Stats() loads"""
+        def key(declaration: stmt.Function):
+            entry = self.stats[declaration]
+            return (filename, entry.line, entry.label)
+
+        result = {}
+        for declaration, entry in self.stats.items():
+            callers = {
+                key(caller): tuple(edge)
+                for caller, edge in entry.callers.items()
+                if caller is not None
+            }
+            result[key(declaration)] = (
+                entry.primitive_calls,
+                entry.calls,
+                entry.self_time,
+                entry.cumulative,
+                callers
+            )
+
+        with open(path, "wb") as file:
+            marshal.dump(result, file)
+
+    def dump_collapsed(self, path: str):
+        """Write collapsed stacks (`a;b;c <microseconds>`) for flamegraph tools"""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, self_time in self.stacks.items():
+                file.write(f"{";".join(stack)} {round(self_time * 1_000_000)}\n")
+
+# region sampling
+
+_run_code = ZSDFunction.run.__code__
+_native_call_code = ZSDNativeFunction.call.__code__
+
+def node_line(node: object, depth: int = 3) -> int | None:
+    """
+    Find the source line of an AST node, statements know theirs from the parser.
+    Expressions are looked up from the first token they hold.
+    """
+    if isinstance(node, stmt.Stmt) and node.line is not None:
+        return node.line
+    if isinstance(node, (list, tuple)):
+        fields = dict(enumerate(node))
+    else:
+        fields = getattr(node, "__dict__", None)
+    if not fields:
+        return None
+    
+    for value in fields.values():
+        if isinstance(value, Token):
+            return value.line
+        
+    if depth:
+        for value in fields.values():
+            line = node_line(value, depth - 1)
+            if line is not None:
+                return line
+
+class SamplingProfiler:
+    """
+    Statistical profiler, a background thread periodically grabs the
+    interpreter thread's python stack and maps it back to ZSD functions and lines.
+    Nothing in the interpreter changes, so the only cost is the sampling itself.
+    """
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self.lines: dict[int, int | None] = {}
+        self._target: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        """Start sampling the calling thread"""
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="zsd-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target) # type: ignore
+            if frame is not None:
+                self.samples[self.zsd_stack(frame)] += 1
+            del frame
+
+    def line_of(self, node: object):
+        # Nodes don't change, so their lines are looked up only once
+        key = id(node)
+        if key not in self.lines:
+            self.lines[key] = node_line(node)
+        return self.lines[key]
+
+    def zsd_stack(self, frame: FrameType | None) -> tuple[str, ...]:
+        """Recover the ZSD call stack from the visit_* and call frames, outermost first"""
+        stack: list[str] = []
+        line = None
+
+        while frame is not None:
+            code = frame.f_code
+            if code is _run_code:
+                function = frame.f_locals["self"]
+                if line is None:
+                    # Sampled while setting up the call
+                    line = function.declaration.name.line
+                stack.append(f"{function_label(function)}:{line}")
+                line = None
+            elif code is _native_call_code:
+                stack.append(f"<native {frame.f_locals["self"].name}>")
+            elif line is None and code.co_name.startswith("visit_"):
+                locals = frame.f_locals
+                line = self.line_of(locals.get("stmt") or locals.get("expr"))
+            frame = frame.f_back
+
+        stack.append(f"<script>:{line}")
+        stack.reverse()
+        return tuple(stack)
+    
+    # region reports
+
+    def print_report(self, stream: TextIO = sys.stderr, limit: int = 20):
+        """Print the frames that were on top of the stack most often"""
+        total = sum(self.samples.values())
+        top = Counter()
+        for stack, count in self.samples.items():
+            top[stack[-1]] += count
+
+        print(f"{total} samples every {self.interval * 1000:g}ms", file=stream)
+        for frame, count in top.most_common(limit):
+            print(f"{count:>8} {count / total:>7.1%}  {frame}", file=stream)
+
+    def dump_collapsed(self, path: str):
+        """Write collapsed stacks (`a;b;c <samples>`) for flamegraph tools"""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.samples.items():
+                file.write(f"{";".join(stack)} {count}\n")
+
+# region line counts
+
+def walk_statements(node: object) -> Iterator[stmt.Stmt]:
+    """Yield every statement in a tree, including function and method bodies"""
+    if isinstance(node, stmt.Stmt):
+        yield node
+    
+    if isinstance(node, stmt.Class):
+        # The class statement runs, its method declarations don't
+        for method in node.methods:
+            yield from walk_statements(method.body)
+        return
+    
+    if isinstance(node, AnonObject):
+        yield from walk_statements(node.attributes)
+        for method in node.methods.values():
+            yield from walk_statements(method.body)
+        return
+    
+    if isinstance(node, (list, tuple)):
+        children = node
+    elif isinstance(node, dict):
+        children = node.values()
+    elif isinstance(node, (stmt.Stmt, stmt.Param, Expr)):
+        children = vars(node).values()
+    else:
+        return
+    
+    for child in children:
+        yield from walk_statements(child)
+
+class LineCounter:
+    """
+    Counts how often every statement runs, for coverage and heatmaps.
+    Like the profiler it swaps Interpreter.execute() on the instance,
+    so there is no branch in execute() when it's not installed.
+    """
+    def __init__(self) -> None:
+        self.counts: Counter[stmt.Stmt] = Counter()
+        self.statements: set[stmt.Stmt] = set()
+        self.lines: dict[stmt.Stmt, int | None] = {}
+
+    def install(self, interpreter: Interpreter):
+        counts = self.counts
+
+        def count(original_execute: Callable[[stmt.Stmt], object]):
+            def execute(statement: stmt.Stmt):
+                counts[statement] += 1
+                return original_execute(statement)
+            return execute
+        
+        def collect(original_interpret: Callable[[Sequence[stmt.Stmt]], None]):
+            def interpret(statements: Sequence[stmt.Stmt]):
+                # Remember the whole program so lines that never ran show up too
+                self.statements.update(walk_statements(statements))
+                return original_interpret(statements)
+            return interpret
+
+        interpreter.add_hook(self, "execute", count)
+        interpreter.add_hook(self, "interpret", collect)
+
+    def uninstall(self, interpreter: Interpreter):
+        interpreter.remove_hooks(self)
+
+    def line_counts(self) -> dict[int, int]:
+        """
+        Executions per source line, lines with statements that never ran are 0.
+        A line holding several statements reports the busiest one.
+        """
+        result: dict[int, int] = {}
+        for statement in self.statements | self.counts.keys():
+            if statement not in self.lines:
+                self.lines[statement] = node_line(statement)
+            line = self.lines[statement]
+            if line is not None:
+                result[line] = max(result.get(line, 0), self.counts[statement])
+
+        return dict(sorted(result.items()))
+    
+    # region reports
+
+    def dump_json(self, path: str, filename: str = "<zsd>"):
+        counts = self.line_counts()
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "file": filename,
+                "executable_lines": len(counts),
+                "covered_lines": sum(1 for count in counts.values() if count),
+                "lines": counts
+            }, file, indent=4)
+
+    def write_annotated(self, stream: TextIO, source: str):
+        """Write the source with execution counts in the margin, gcov style"""
+        counts = self.line_counts()
+        width = max([len(str(count)) for count in counts.values()] + [5])
+
+        for number, text in enumerate(source.splitlines(), 1):
+            count = counts.get(number)
+            margin = "" if count is None else str(count) if count else "#" * 5
+            stream.write(f"{margin:>{width}}: {number:>5}: {text}\n")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import io
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+from environment import Environment
+from expr import Expr
+from interpreter import Interpreter
+from output import CompileError, Reporter
+from stmt import Stmt
+import natives
+
+if TYPE_CHECKING:
+    from _typeshed import SupportsWrite
+
+@dataclass(frozen=True, repr=False, eq=False)
+class Program:
+    """
+    A scanned, parsed and resolved script, ready to run any number of times.
+    Nothing here changes while it runs, every run gets an interpreter of its own,
+    so one program can be shared between threads.
+    """
+    source: str
+    statements: tuple[Stmt, ...]
+    # Scope distances from the resolver, a read-only view shared by every run
+    locals: MappingProxyType[Expr, int]
+
+    def interpreter(
+        self,
+        globals: Environment | None = None,
+        output: SupportsWrite[str] | None = None,
+        errors: SupportsWrite[str] | None = None
+    ) -> Interpreter:
+        """
+        A fresh interpreter to run this program with, for setting limits or a trace first.
+        Without `globals` the program gets a new global environment with the natives in it.
+        """
+        interpreter = Interpreter(output, errors)
+        interpreter.locals = self.locals
+        if globals is None:
+            natives.inject(interpreter)
+        else:
+            interpreter.globals = interpreter.env = globals
+        return interpreter
+
+    def run(
+        self,
+        globals: Environment | None = None,
+        output: SupportsWrite[str] | None = None,
+        errors: SupportsWrite[str] | None = None
+    ) -> Interpreter:
+        """Run the program, runtime errors are reported like zaurshadow.run() does"""
+        interpreter = self.interpreter(globals, output, errors)
+        interpreter.interpret(self.statements)
+        return interpreter
+
+    def __repr__(self) -> str:
+        return f"<Program statements={len(self.statements)}>"
+
+def compile(source: str) -> Program:
+    """Turn a source into a Program, raising CompileError if it doesn't parse or resolve"""
+    # Only needed here, running a compiled program doesn't load the front end
+    from resolver import Resolver
+    from scanner import Scanner
+    from zsdparser import Parser
+
+    messages = io.StringIO()
+    reporter = Reporter(messages)
+    statements = Parser(Scanner(source, reporter).scan_tokens(), reporter).parse()
+
+    if not reporter.had_error:
+        resolving = Interpreter(errors=messages)
+        Resolver(resolving).resolve(statements)
+        reporter = resolving.reporter
+
+    if reporter.had_error:
+        raise CompileError(messages.getvalue().rstrip("\n"))
+    
+    return Program(source, tuple(statements), MappingProxyType(resolving.own_locals()))
@@ -5,7 +5,6 @@ import stmt
 from stmt import Stmt
 from interpreter import Interpreter
 from zsdtoken import Token
-import output
 
 class FuncType(Enum):
     none = auto()
@@ -66,14 +65,23 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
 
     def visit_return_stmt(self, stmt: stmt.Return) -> None:
         if self.current_func == FuncType.none:
-            output.error(stmt.keyword, "Return outside function.")
+            self.interpreter.reporter.error(stmt.keyword, "Return outside function.")
 
         if stmt.value:
             if self.current_func == FuncType.initializer:
-                output.error(stmt.keyword, "Returning a value from an initializer is forbidden.")
+                self.interpreter.reporter.error(stmt.keyword, "Returning a value from an initializer is forbidden.")
 
             self.resolve(stmt.value)
 
+    def visit_yield_stmt(self, stmt: stmt.Yield) -> None:
+        if self.current_func == FuncType.none:
+            self.interpreter.reporter.error(stmt.keyword, "Yield outside function.")
+
+        if self.current_func == FuncType.initializer:
+            self.interpreter.reporter.error(stmt.keyword, "An initializer cannot yield.")
+
+        self.resolve(stmt.value)
+
     def visit_print_stmt(self, stmt: stmt.Print) -> None:
         self.resolve(stmt.expression)
 
@@ -90,7 +98,7 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
 
         if stmt.superclass:
             if stmt.superclass.name.lexeme == stmt.name.lexeme:
-                output.error(stmt.superclass.name, "A class cannot inherit from an identifier of its name.")
+                self.interpreter.reporter.error(stmt.superclass.name, "A class cannot inherit from an identifier of its name.")
 
             self.current_class = ClassType.subclass
             self.resolve(stmt.superclass)
@@ -113,15 +121,20 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
         self.current_class = enclosing_class
 
     def visit_for_stmt(self, stmt: stmt.For) -> None:
-        self.resolve_local(Variable(stmt.iter_var), stmt.iter_var)
         self.resolve(stmt.iterable)
+
+        # The loop variable gets a scope of its own
+        self.new_scope()
+        self.declare(stmt.iter_var)
+        self.define(stmt.iter_var)
         self.resolve(stmt.body)
+        self.pop_scope()
 
     # region expr visits
 
     def visit_variable_expr(self, expr: expr.Variable) -> None:
-        if self.scopes and not self.scopes[-1].get(expr.name.lexeme, True):
-            output.error(expr.name, "Unbound local variable.")
+        if self.scopes and (entry := self.scopes[-1].get(expr.name.lexeme)) and not entry.ready:
+            self.interpreter.reporter.error(expr.name, "Unbound local variable.")
 
         self.resolve_local(expr, expr.name)
 
@@ -138,6 +151,11 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
             self.resolve(expr.left)
         self.resolve(expr.right)
 
+    def visit_interpolation_expr(self, expr: expr.Interpolation) -> None:
+        for part in expr.parts:
+            if isinstance(part, Expr):
+                self.resolve(part)
+
     def visit_unary_expr(self, expr: expr.Unary) -> None:
         self.resolve(expr.right)
 
@@ -166,13 +184,13 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
 
     def visit_this_expr(self, expr: expr.This) -> None:
         if self.current_class == ClassType.none:
-            output.error(expr.keyword, "'this' outside class.")
+            self.interpreter.reporter.error(expr.keyword, "'this' outside class.")
 
         self.resolve_local(expr, expr.keyword)
 
     def visit_super_expr(self, expr: expr.Super) -> None:
         if self.current_class != ClassType.subclass:
-            output.error(expr.keyword, "'super' outside subclass.")
+            self.interpreter.reporter.error(expr.keyword, "'super' outside subclass.")
 
         self.resolve_local(expr, expr.keyword)
 
@@ -182,6 +200,9 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
     # TODO
     # Reference the class visit
     def visit_anonobject_expr(self, expr: expr.AnonObject) -> None:
+        for value in expr.attributes.values():
+            self.resolve(value)
+
         enclosing_class = self.current_class
         # Anonymous objects can use `this` in their methods
         self.current_class = ClassType.anonobject
@@ -190,7 +211,7 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
 
         init = expr.methods.get("init")
         if init is not None and init.params:
-            output.error(init.name, "init() method of anynomous object may not have parameters.")
+            self.interpreter.reporter.error(init.name, "init() method of anynomous object may not have parameters.")
 
         for name, method in expr.methods.items():
             self.resolve_function(
@@ -227,7 +248,7 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
             self.declare(param.name)
             self.define(param.name)
 
-        self.resolve(func.body)
+        self.resolve(func.body.statements)
         self.pop_scope()
         self.current_func = enclosing_scope
 
@@ -238,8 +259,8 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
         scope = self.scopes.pop()
         for entry in scope.values():
             if not entry.used and entry.token and not entry.token.lexeme.startswith("_"):
-                output.error(entry.token, f"Local variable unused.")
-                output.error(entry.token, f"help: If this was intentional, prefix it with an underscore.")
+                self.interpreter.reporter.error(entry.token, f"Local variable unused.")
+                self.interpreter.reporter.error(entry.token, f"help: If this was intentional, prefix it with an underscore.")
 
     def declare(self, name: Token):
         if not self.scopes: return
@@ -247,7 +268,7 @@ class Resolver(expr.Visitor[None], stmt.Visitor[None]):
 
         if name.lexeme in scope and (token := scope[name.lexeme].token):
             # TODO: Maybe change this error message in the future lol
-            return output.error(token, "Variable redeclaration is forbidden.")
+            return self.interpreter.reporter.error(token, "Variable redeclaration is forbidden.")
 
         scope[name.lexeme] = ScopeEntry(name, False)
 
@@ -14,8 +14,9 @@ re_varname_valid = re.compile(r"[a-zA-Z\d_]")
 
 # I simply and unfortunately do not know how this works
 class Scanner:
-    def __init__(self, source: str) -> None:
+    def __init__(self, source: str, reporter: output.Reporter | None = None) -> None:
         self.source = source
+        self.reporter = reporter or output.Reporter()
         self.tokens: list[Token] = []
         self.start = 0
         self.current = 0
@@ -70,7 +71,7 @@ class Scanner:
                     line = self.line
                     while True:
                         if self.is_at_end():
-                            output.errorline(line, "Unterminated multiline comment")
+                            self.reporter.errorline(line, "Unterminated multiline comment")
                             break
 
                         if self.peek() == "*" and self.peek_next() == "/":
@@ -101,7 +102,7 @@ class Scanner:
                 elif re_varname_valid.match(char):
                     self.parse_identifier()
                 else:
-                    output.errorline(self.line, "Unexpected character.")
+                    self.reporter.errorline(self.line, "Unexpected character.")
 
     def parse_string(self):
         while (
@@ -109,19 +110,66 @@ class Scanner:
             and not self.is_at_end()
         ):
             if self.peek() == "\n":
-                output.errorline(self.line, "Unterminated string at newline.")
+                self.reporter.errorline(self.line, "Unterminated string at newline.")
 
             self.advance()
 
         if self.is_at_end():
-            output.errorline(self.line, "Unterminated string at EOF.")
+            self.reporter.errorline(self.line, "Unterminated string at EOF.")
 
         self.advance()
 
         value = self.source[self.start+1:self.current-1]
         #print(value)
+        if "{" in value or "}}" in value:
+            parts = self.split_interpolation(value)
+            if len(parts) > 1:
+                return self.add_token(tt.INTERPOLATION, parts)
+            value, = parts
+
         self.add_token(tt.STRING, value)
 
+    def split_interpolation(self, value: str):
+        """
+        Split "a {b} c" into ["a ", "b", " c"], constant text at even indices
+        and expression sources at odd ones. "{{" and "}}" escape the braces.
+        """
+        parts: list[str] = []
+        text: list[str] = []
+        i = 0
+
+        while i < len(value):
+            char = value[i]
+
+            if char in "{}" and value[i+1:i+2] == char:
+                text.append(char)
+                i += 2
+                continue
+
+            if char != "{":
+                text.append(char)
+                i += 1
+                continue
+
+            depth = 1
+            end = i + 1
+            while end < len(value) and depth:
+                if value[end] == "{": depth += 1
+                elif value[end] == "}": depth -= 1
+                end += 1
+
+            if depth:
+                self.reporter.errorline(self.line, "Unterminated string interpolation.")
+                break
+
+            parts.append("".join(text))
+            parts.append(value[i+1:end-1])
+            text = []
+            i = end
+
+        parts.append("".join(text))
+        return parts
+
     def parse_number(self):
         while intable(self.peek()): self.advance()
         dot = "." in self.source[self.start:self.current]
@@ -0,0 +1,158 @@
+"""
+A daemon that keeps forked workers with the whole runtime imported,
+so a tiny script costs a socket round trip instead of a python startup.
+
+    zaurshadow --serve /tmp/zsd.sock -j 4 --recycle 100
+    python zsdclient.py /tmp/zsd.sock script.zsd
+
+A request is one JSON line, {"path": ...} or {"source": ...}.
+The answer is JSON lines too, {"output": ...} as the script prints and a final {"exit": code}.
+"""
+from functools import lru_cache
+import json
+import os
+from pathlib import Path
+import signal
+import socket
+import stat
+import sys
+import traceback
+from output import OUTPUT_BUFFER_SIZE, BufferedStream, CompileError
+from program import Program, compile
+
+# Compiled programs kept per worker, keyed by source so edited files just miss
+PROGRAM_CACHE_SIZE = 256
+
+type Limits = tuple[int | None, float | None, int | None]
+
+def send(connection: socket.socket, message: dict[str, object]):
+    connection.sendall(json.dumps(message).encode() + b"\n")
+
+class SocketStream:
+    """What the script prints, sent to the client as it happens"""
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+
+    def write(self, text: str):
+        if text:
+            send(self.connection, {"output": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+@lru_cache(PROGRAM_CACHE_SIZE)
+def cached_compile(source: str) -> Program:
+    return compile(source)
+
+def handle(connection: socket.socket, limits: Limits, buffer_size: int) -> bool:
+    """Answer one request, False if the job crashed and this worker should be replaced"""
+    with connection.makefile("rb") as requests:
+        request = json.loads(requests.readline())
+    stream = SocketStream(connection)
+
+    try:
+        source = request["source"] if "source" in request else Path(request["path"]).read_text(encoding="utf-8")
+    except OSError as e:
+        print(e, file=stream)
+        send(connection, {"exit": 66})
+        return True
+
+    try:
+        program = cached_compile(source)
+        # Without a buffer every print is a message of its own
+        interpreter = program.interpreter(output=BufferedStream(stream, buffer_size) if buffer_size > 0 else stream)
+        interpreter.set_limits(*limits)
+        interpreter.interpret(program.statements)
+    except CompileError as e:
+        print(e.message, file=stream)
+        send(connection, {"exit": 65})
+        return True
+    except OSError:
+        # The client went away
+        raise
+    except Exception as e:
+        # interpret() already flushed what the script printed
+        print(f"Internal error: {type(e).__name__}: {e}", file=stream)
+        send(connection, {"exit": 70})
+        return False
+
+    send(connection, {"exit": 70 if interpreter.reporter.had_runtime_error else 0})
+    return True
+
+def worker(listener: socket.socket, recycle: int, limits: Limits, buffer_size: int):
+    """Take `recycle` jobs off the shared socket, then exit so the server forks a fresh worker"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    for _ in range(recycle):
+        connection, _ = listener.accept()
+        with connection:
+            try:
+                if not handle(connection, limits, buffer_size):
+                    # Whatever crashed may have left this process in a bad state, start over fresh
+                    return
+            except (OSError, ValueError):
+                # The client went away or sent garbage, the next one is unaffected
+                pass
+
+def remove_stale_socket(path: str):
+    """Remove a socket a server that's gone left behind, anything else already at `path` stops this one from starting"""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        sys.exit(f"Cannot serve on {path}: it exists and is not a socket.")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    sys.exit(f"Cannot serve on {path}: another server is listening there.")
+
+def serve(path: str, workers: int, recycle: int, limits: Limits, buffer_size: int = OUTPUT_BUFFER_SIZE):
+    remove_stale_socket(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+
+    children: set[int] = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                worker(listener, recycle, limits, buffer_size)
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for _ in range(workers):
+            spawn()
+        print(f"Serving on {path} with {workers} workers.", file=sys.stderr)
+
+        while True:
+            pid, _ = os.wait()
+            children.discard(pid)
+            spawn()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        os.unlink(path)
@@ -0,0 +1,140 @@
+"""
+Runtime counters, for seeing which overheads a script triggers.
+
+Counting works like the profilers: enable() hooks a few methods on one interpreter instance,
+so an interpreter that isn't counted pays nothing and two interpreters never share counters.
+Only what the interpreter does for the script is counted, natives calling each other
+or building objects of their own don't show up.
+"""
+from __future__ import annotations
+from collections import Counter
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+from callables import ZSDFunction, ZSDNativeFunction
+from classes import ZSDClass, ZSDObject
+from environment import Environment
+from expr import AnonObject, Call, Expr, Get, LiteralValue, Range, Super
+import stmt
+from zsdtoken import Token
+
+if TYPE_CHECKING:
+    from interpreter import Interpreter
+
+class Stats:
+    """The counters of one interpreter"""
+    def __init__(self) -> None:
+        self.counters: Counter[str] = Counter()
+        self.allocations: Counter[str] = Counter()
+
+    def snapshot(self) -> dict[str, object]:
+        counters = self.counters
+        return {
+            "environments": counters["environments"],
+            "user_calls": counters["user_calls"],
+            "native_calls": counters["native_calls"],
+            "bound_methods": counters["bound_methods"],
+            "returns": counters["returns"],
+            "local_lookups": counters["local_lookups"],
+            "global_lookups": counters["global_lookups"],
+            "allocations": dict(self.allocations),
+        }
+
+def enable(interpreter: Interpreter) -> Stats:
+    """Start counting on `interpreter`, calling it again keeps the counters it has"""
+    existing = interpreter.__dict__.get("_stats")
+    if existing is not None:
+        return existing
+
+    stats = interpreter._stats = Stats()
+    counters = stats.counters
+    allocations = stats.allocations
+    # The method each hook wraps, set again whenever the hook chain is rebuilt
+    original: dict[str, Callable] = {}
+
+    def call_function(function: ZSDFunction, env: Environment) -> object:
+        counters["user_calls"] += 1
+        counters["environments"] += 1
+        return original["call_function"](function, env)
+
+    def call_coroutine(function: ZSDFunction, env: Environment):
+        counters["user_calls"] += 1
+        counters["environments"] += 1
+        return original["call_coroutine"](function, env)
+
+    def lookup_variable(name: Token, expr: Expr):
+        counters["local_lookups" if expr in interpreter.locals else "global_lookups"] += 1
+        return original["lookup_variable"](name, expr)
+
+    def visit_block_stmt(statement: stmt.Block) -> None:
+        counters["environments"] += 1
+        return original["visit_block_stmt"](statement)
+
+    def visit_for_stmt(statement: stmt.For) -> None:
+        counters["environments"] += 1
+        return original["visit_for_stmt"](statement)
+
+    def visit_class_stmt(statement: stmt.Class) -> None:
+        if statement.superclass:
+            counters["environments"] += 1
+        return original["visit_class_stmt"](statement)
+
+    def visit_return_stmt(statement: stmt.Return):
+        counters["returns"] += 1
+        return original["visit_return_stmt"](statement)
+
+    def visit_call_expr(expr: Call) -> object:
+        # The callee is evaluated here to see what it is, the real visit gets the value
+        callee = interpreter.evaluate(expr.callee)
+        result = original["visit_call_expr"](Call(LiteralValue(callee), expr.paren, expr.arguments))
+        if isinstance(callee, ZSDNativeFunction):
+            counters["native_calls"] += 1
+        elif isinstance(callee, ZSDClass) and isinstance(result, ZSDObject) and not isinstance(result, ZSDClass):
+            allocations[callee.name] += 1
+            if type(callee.find_method("init")) is ZSDFunction:
+                # init is bound to the new instance
+                counters["bound_methods"] += 1
+                counters["environments"] += 1
+        return result
+
+    def visit_get_expr(expr: Get) -> object:
+        result = original["visit_get_expr"](expr)
+        if isinstance(result, ZSDNativeFunction) and result.binding is not None:
+            counters["bound_methods"] += 1
+        elif type(result) is ZSDFunction and "this" in result.closure.values:
+            counters["bound_methods"] += 1
+            counters["environments"] += 1
+        return result
+
+    def visit_super_expr(expr: Super) -> object:
+        counters["bound_methods"] += 1
+        counters["environments"] += 1
+        return original["visit_super_expr"](expr)
+
+    def visit_range_expr(expr: Range) -> object:
+        allocations["range"] += 1
+        return original["visit_range_expr"](expr)
+
+    def visit_anonobject_expr(expr: AnonObject) -> object:
+        allocations["<object>"] += 1
+        return original["visit_anonobject_expr"](expr)
+
+    hooks = (
+        call_function, call_coroutine, lookup_variable, visit_block_stmt, visit_for_stmt, visit_class_stmt,
+        visit_return_stmt, visit_call_expr, visit_get_expr, visit_super_expr,
+        visit_range_expr, visit_anonobject_expr,
+    )
+    def layer(hook: Callable):
+        def wrap(inner: Callable) -> Callable:
+            original[hook.__name__] = inner
+            return hook
+        return wrap
+
+    for hook in hooks:
+        interpreter.add_hook(stats, hook.__name__, layer(hook))
+    return stats
+
+def disable(interpreter: Interpreter):
+    """Stop counting, the counters are gone with it and other hooks stay"""
+    stats = interpreter.__dict__.pop("_stats", None)
+    if stats is not None:
+        interpreter.remove_hooks(stats)
@@ -10,7 +10,7 @@ from zsdtoken import Token
 if TYPE_CHECKING:
     norepr_dataclass = dataclass
 else:
-    norepr_dataclass = partial(dataclass, repr=False)
+    norepr_dataclass = partial(dataclass, repr=False, eq=False)
 
 class Visitor[T](Protocol):
     def visit_expression_stmt(self, stmt: Expression) -> T: ...
@@ -20,11 +20,15 @@ class Visitor[T](Protocol):
     def visit_class_stmt(self, stmt: Class) -> T: ...
     def visit_print_stmt(self, stmt: Print) -> T: ...
     def visit_return_stmt(self, stmt: Return) -> T: ...
+    def visit_yield_stmt(self, stmt: Yield) -> T: ...
     def visit_var_stmt(self, stmt: Var) -> T: ...
     def visit_while_stmt(self, stmt: While) -> T: ...
     def visit_for_stmt(self, stmt: For) -> T: ...
 
 class Stmt(ABC): 
+    # Line the statement starts on, set by the parser
+    line: int | None = None
+
     def accept[T](self, visitor: Visitor[T]) -> T: 
         return getattr(visitor, f"visit_{type(self).__name__.lower()}_stmt")(self)
     
@@ -51,6 +55,8 @@ class Function(Stmt):
     name: Token
     params: list[Param]
     body: Block
+    # Statements of the body with a yield somewhere inside, empty unless it's a generator
+    yielding: frozenset[Stmt] = frozenset()
 
 @norepr_dataclass
 class If(Stmt):
@@ -76,6 +82,11 @@ class Return(Stmt):
     keyword: Token
     value: Expr
 
+@norepr_dataclass
+class Yield(Stmt):
+    keyword: Token
+    value: Expr
+
 @norepr_dataclass
 class Var(Stmt):
     name: Token
@@ -83,6 +94,7 @@ class Var(Stmt):
 
 @norepr_dataclass
 class While(Stmt):
+    keyword: Token
     condition: Expr
     body: Stmt
 
@@ -0,0 +1,197 @@
+"""
+The scheduler behind spawn(), sleep(), readTextAsync() and await().
+
+A spawned task is a coroutine: the interpreter walks its function with run_coroutine(),
+a python generator that yields the task it awaits whenever that one isn't done yet.
+Calls the task makes as statements of their own run as coroutines too, so an await
+anywhere down such a chain suspends the whole task, frames and environments included.
+One loop steps the coroutines that can run, one at a time and all on the thread the script runs on:
+a task runs until it awaits something unfinished or ends, then the next one in the run queue goes.
+When every task is waiting, the loop blocks on timers and reads for all of them.
+
+An await that can't suspend, like one in the script's top level or inside a larger expression,
+runs that same loop right where it is until its task is done.
+
+Blocking work like file reads runs on a small shared thread pool.
+The deterministic profiler times calls on the python stack through call_function(),
+so the calls a task makes through call_coroutine() don't show up in it.
+"""
+from __future__ import annotations
+from collections import deque
+from collections.abc import Callable, Generator
+from concurrent.futures import Future, ThreadPoolExecutor
+import heapq
+from itertools import count
+import queue
+import time
+from typing import TYPE_CHECKING
+from natives import DEADLOCK
+from output import NativeError
+
+if TYPE_CHECKING:
+    from environment import Environment
+    from interpreter import Interpreter
+    from natives import ZSDTask
+
+IO_WORKERS = 8
+
+class Fiber:
+    """A spawned task's coroutine and where it stopped, or an await that runs the loop in place"""
+    def __init__(self, steps: Generator[ZSDTask, None, None] | None = None) -> None:
+        # None for an await that can't suspend
+        self.steps = steps
+        self.env: Environment | None = None
+        # The task's own call depth, see Limits
+        self.depth = 0
+        # The wake callback of the await this fiber is suspended in
+        self.waiting: Callable[[], None] | None = None
+
+class Scheduler:
+    """Spawned tasks, timers and background reads of one interpreter"""
+    def __init__(self, interpreter: Interpreter) -> None:
+        self.interpreter = interpreter
+        # Fibers that can run, in the order they became able to
+        self.ready: deque[Fiber] = deque()
+        # Fibers suspended in an await and awaits running the loop, oldest first
+        self.awaiting: list[Fiber] = []
+        # Spawned fibers that haven't ended yet
+        self.alive: set[Fiber] = set()
+        # (deadline, sequence, callback), the sequence keeps equal deadlines in order
+        self.timers: list[tuple[float, int, Callable[[], None]]] = []
+        # Callbacks of finished background work, put here by the pool threads
+        self.completed: queue.SimpleQueue[Callable[[], None]] = queue.SimpleQueue()
+        self.executor: ThreadPoolExecutor | None = None
+        self.in_flight = 0
+        self.sequence = count()
+        # Errors of spawned tasks nobody has awaited yet
+        self.unhandled: list[Exception] = []
+
+    def spawn(self, start: Callable[[], Generator[ZSDTask, None, None]]):
+        fiber = Fiber(start())
+        fiber.env = self.interpreter.globals
+        self.alive.add(fiber)
+        self.ready.append(fiber)
+
+    def call_later(self, delay: float, callback: Callable[[], None]):
+        heapq.heappush(self.timers, (time.monotonic() + delay, next(self.sequence), callback))
+
+    def run_in_background[T](self, function: Callable[[], T], callback: Callable[[Future[T]], None]):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(IO_WORKERS, thread_name_prefix="zsd-io")
+        self.in_flight += 1
+        future = self.executor.submit(function)
+        future.add_done_callback(lambda future: self.completed.put(lambda: callback(future)))
+
+    def wait(self, task: ZSDTask) -> bool:
+        """
+        Run the other tasks until `task` is done, for an await that can't suspend,
+        False if it never could be because every task is waiting on another.
+        """
+        waiter = Fiber()
+        self.awaiting.append(waiter)
+        try:
+            # The tasks that are ready get their turn first, like they would if this await suspended
+            for _ in range(len(self.ready)):
+                self.step(self.ready.popleft())
+            return self.run_until(lambda: task.done, waiter)
+        finally:
+            self.awaiting.remove(waiter)
+
+    def drain(self):
+        """Wait for every spawned task at the end of a script, and raise the first error none of them handled"""
+        self.run_until(lambda: not self.alive)
+        if self.unhandled:
+            error = self.unhandled[0]
+            self.unhandled.clear()
+            raise error
+
+    def close(self):
+        """Throw away the tasks a failed script left waiting"""
+        for fiber in self.alive:
+            assert fiber.steps is not None
+            fiber.steps.close()
+        self.alive.clear()
+        self.ready.clear()
+        self.awaiting.clear()
+
+    # region running
+
+    def run_until(self, done: Callable[[], bool], waiter: Fiber | None = None) -> bool:
+        """
+        Step tasks, and block for timers or reads while every task waits, until `done()`.
+        When nothing can wake anyone anymore, the await made last gives up:
+        False if that's `waiter`, a task that made it gets an error instead.
+        """
+        while True:
+            self.finish_due()
+            if done():
+                return True
+            if self.ready:
+                self.step(self.ready.popleft())
+                continue
+
+            if not self.timers and not self.in_flight:
+                last = self.awaiting[-1]
+                if last is waiter:
+                    return False
+                self.give_up(last)
+                continue
+
+            timeout = max(0, self.timers[0][0] - time.monotonic()) if self.timers else None
+            try:
+                callback = self.completed.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                self.in_flight -= 1
+                callback()
+
+    def step(self, fiber: Fiber, error: Exception | None = None):
+        """Run a task until it awaits something unfinished or ends, with its environment and call depth"""
+        assert fiber.steps is not None
+        interpreter = self.interpreter
+        limits = interpreter.limits
+        env = interpreter.env
+        interpreter.env = fiber.env
+        if limits is not None:
+            depth, limits.depth = limits.depth, fiber.depth
+        try:
+            task = fiber.steps.send(None) if error is None else fiber.steps.throw(error)
+        except StopIteration:
+            self.alive.discard(fiber)
+            return
+        finally:
+            fiber.env = interpreter.env
+            interpreter.env = env
+            if limits is not None:
+                fiber.depth, limits.depth = limits.depth, depth
+
+        def wake():
+            if fiber.waiting is wake:
+                fiber.waiting = None
+                self.awaiting.remove(fiber)
+                self.ready.append(fiber)
+
+        fiber.waiting = wake
+        task.waiters.append(wake)
+        self.awaiting.append(fiber)
+
+    def give_up(self, fiber: Fiber):
+        """Fail the await `fiber` is suspended in, it would wait forever"""
+        fiber.waiting = None
+        self.awaiting.remove(fiber)
+        self.step(fiber, NativeError(DEADLOCK))
+
+    def finish_due(self):
+        """Run callbacks of expired timers and finished reads, neither runs ZSD code"""
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            heapq.heappop(self.timers)[2]()
+
+        while True:
+            try:
+                callback = self.completed.get_nowait()
+            except queue.Empty:
+                return
+            self.in_flight -= 1
+            callback()
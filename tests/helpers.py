@@ -0,0 +1,39 @@
+"""
+Shared bits of the tests, run them from the repository root:
+
+    python -m unittest discover tests -t .
+"""
+import io
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+from interpreter import Interpreter
+import natives
+import zaurshadow
+
+ROOT = Path(__file__).parent.parent
+
+def make_interpreter() -> Interpreter:
+    interpreter = Interpreter(io.StringIO())
+    natives.inject(interpreter)
+    return interpreter
+
+def run(source: str, interpreter: Interpreter | None = None) -> str:
+    """Everything the script printed, errors included"""
+    interpreter = interpreter or make_interpreter()
+    stream = interpreter.stream
+    assert isinstance(stream, io.StringIO)
+    start = stream.tell()
+    zaurshadow.run(interpreter, source)
+    return stream.getvalue()[start:]
+
+def run_cli(source: str, *args: str, timeout: float = 30) -> subprocess.CompletedProcess[str]:
+    """Run a script through the command line in a fresh process"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory, "script.zsd")
+        path.write_text(source, encoding="utf-8")
+        return subprocess.run(
+            [sys.executable, str(ROOT / "zaurshadow.py"), *args, str(path)],
+            capture_output=True, text=True, timeout=timeout, cwd=directory,
+        )
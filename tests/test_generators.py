@@ -0,0 +1,22 @@
+import unittest
+from tests.helpers import run, run_cli
+
+class GeneratorTest(unittest.TestCase):
+    def test_yields_from_loops(self):
+        source = "declare g() { for i of 0..3 { yield i; } }\nfor x of g() { print x; }\n"
+        self.assertEqual(run(source), "0\n1\n2\n")
+
+    def test_runaway_body_hits_max_steps(self):
+        source = "declare g() { while true { if false { yield 1; } } }\nfor _x of g() { }\n"
+        result = run_cli(source, "--max-steps", "10000")
+        self.assertEqual(result.returncode, 70)
+        self.assertIn("Step limit of 10000 exceeded.", result.stdout + result.stderr)
+
+    def test_runaway_for_hits_timeout(self):
+        source = "declare g() { for _i of 0..100000000 { if false { yield 1; } } }\nfor _x of g() { }\n"
+        result = run_cli(source, "--timeout", "0.2")
+        self.assertEqual(result.returncode, 70)
+        self.assertIn("Time limit of 0.2s exceeded.", result.stdout + result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
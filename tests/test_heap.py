@@ -0,0 +1,39 @@
+import unittest
+from callables import ZSDNativeFunction
+from heap import HeapSnapshot
+from tests.helpers import make_interpreter, run
+
+class HeapRootsTest(unittest.TestCase):
+    def snapshots(self, source: str) -> list[HeapSnapshot]:
+        interpreter = make_interpreter()
+        taken: list[HeapSnapshot] = []
+        interpreter.globals.define("snap", ZSDNativeFunction((0, 0), "snap", lambda: taken.append(HeapSnapshot.take(interpreter))))
+        self.assertEqual(run(source, interpreter), "")
+        return taken
+
+    def test_suspended_generator(self):
+        source = (
+            "class Marker {}\n"
+            "declare g() { var _kept = Marker(); for _i of range(2) { yield 1; } }\n"
+            "var gen = g();\ngen.next();\nsnap();\n"
+        )
+        self.assertEqual(self.snapshots(source)[0].counts["Marker"], 1)
+
+    def test_running_generator_loop(self):
+        source = (
+            "class Marker {}\n"
+            "declare g() { for _m of range(1) { var _kept = Marker(); yield snap(); } }\n"
+            "for _x of g() { }\n"
+        )
+        self.assertEqual(self.snapshots(source)[0].counts["Marker"], 1)
+
+    def test_suspended_task(self):
+        source = (
+            "class Marker {}\n"
+            "declare job() { var _kept = Marker(); for _i of range(2) { await(sleep(0.05)); } }\n"
+            "var task = spawn(job);\nawait(sleep(0));\nsnap();\nawait(task);\n"
+        )
+        self.assertEqual(self.snapshots(source)[0].counts["Marker"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from profiler import LineCounter, Profiler
+import stats
+from tests.helpers import make_interpreter, run
+
+DEEP = "declare f(n) { if n == 0 { return 0; } return 1 + f(n - 1); }\nprint f(50);\n"
+
+class HookChainTest(unittest.TestCase):
+    def test_removing_trace_keeps_limits(self):
+        interpreter = make_interpreter()
+        interpreter.set_trace(lambda *_: None)
+        interpreter.set_limits(max_depth=10)
+        interpreter.set_trace(None)
+        self.assertIn("Call depth limit of 10 exceeded.", run(DEEP, interpreter))
+
+    def test_mixed_order(self):
+        interpreter = make_interpreter()
+        events: list[str] = []
+        profiler = Profiler()
+        counter = LineCounter()
+
+        profiler.install(interpreter)
+        interpreter.set_trace(lambda event, *_: events.append(event), ("call",))
+        counter.install(interpreter)
+        stats.enable(interpreter)
+        interpreter.set_limits(max_depth=10)
+
+        profiler.uninstall(interpreter)
+        stats.disable(interpreter)
+        self.assertIn("Call depth limit of 10 exceeded.", run(DEEP, interpreter))
+        self.assertTrue(events)
+        self.assertTrue(counter.counts)
+        self.assertIsNone(interpreter.stats())
+
+        counter.uninstall(interpreter)
+        interpreter.set_limits()
+        self.assertEqual(run(DEEP.replace("50", "5"), interpreter), "5\n")
+        interpreter.set_trace(None)
+        self.assertNotIn("execute", interpreter.__dict__)
+        self.assertNotIn("call_function", interpreter.__dict__)
+
+    def test_removed_layer_under_others(self):
+        interpreter = make_interpreter()
+        interpreter.set_limits(max_depth=10)
+        counter = LineCounter()
+        counter.install(interpreter)
+        interpreter.set_limits()
+        self.assertEqual(run(DEEP.replace("50", "20"), interpreter), "20\n")
+        self.assertTrue(counter.counts)
+
+if __name__ == "__main__":
+    unittest.main()
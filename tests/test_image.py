@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from tests.helpers import run_cli
+
+class SaveImageTest(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "globals.img")
+            self.assertEqual(run_cli("var x = 41;\n", "--save-image", path).returncode, 0)
+            result = run_cli("print x + 1;\n", "--image", path)
+            self.assertEqual(result.stdout, "42\n")
+
+    def test_failed_save_fails_the_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "missing", "globals.img")
+            result = run_cli("var x = 1;\n", "--save-image", str(path))
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("Cannot save image", result.stderr)
+            self.assertFalse(path.exists())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from tests.helpers import make_interpreter, run
+
+class LimitsTest(unittest.TestCase):
+    def limited(self, **limits):
+        interpreter = make_interpreter()
+        interpreter.set_limits(**limits)
+        return interpreter
+
+    def test_while_counts_steps(self):
+        output = run("while true { }\n", self.limited(steps=5000))
+        self.assertIn("Step limit of 5000 exceeded.", output)
+
+    def test_for_counts_steps(self):
+        output = run("for _i of 0..100000 { }\n", self.limited(steps=5000))
+        self.assertIn("Step limit of 5000 exceeded.", output)
+
+    def test_calls_count_steps(self):
+        source = "declare f() { }\nwhile true { f(); }\n"
+        self.assertIn("Step limit of 5000 exceeded.", run(source, self.limited(steps=5000)))
+
+    def test_timeout(self):
+        self.assertIn("Time limit of 0.05s exceeded.", run("while true { }\n", self.limited(timeout=0.05)))
+
+    def test_within_budget(self):
+        self.assertEqual(run("for i of 0..10 { if i == 9 { print i; } }\n", self.limited(steps=100)), "9\n")
+
+    def test_removed(self):
+        interpreter = self.limited(steps=10)
+        interpreter.set_limits()
+        self.assertIsNone(interpreter.limits)
+        self.assertEqual(run("for i of 0..100 { if i == 99 { print i; } }\n", interpreter), "99\n")
+
+if __name__ == "__main__":
+    unittest.main()
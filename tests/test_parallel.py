@@ -0,0 +1,30 @@
+import unittest
+from tests.helpers import run
+
+FUNCTIONS = """
+declare noisy(x) { print "side effect"; return x; }
+declare pure(x) { return x + 1; }
+declare call(f) { return f(3); }
+declare ident(f) { return f; }
+"""
+
+class ParallelMapTest(unittest.TestCase):
+    def test_maps(self):
+        self.assertEqual(run("declare double(x) { return x * 2; }\nprint parallelMap(double, range(6), 2);\n"), "[0, 2, 4, 6, 8, 10]\n")
+
+    def test_rejects_an_item_that_prints(self):
+        source = FUNCTIONS + "var items = list();\nitems.push(pure);\nitems.push(noisy);\nprint parallelMap(call, items, 2);\n"
+        output = run(source)
+        self.assertIn("can't run a function that prints", output)
+        self.assertNotIn("side effect", output)
+
+    def test_rejects_a_mutable_item(self):
+        source = FUNCTIONS + "var items = list();\nitems.push(list());\nprint parallelMap(ident, items, 2);\n"
+        self.assertIn("can't send 'item 0' to the workers", run(source))
+
+    def test_function_items(self):
+        source = FUNCTIONS + "var items = list();\nitems.push(pure);\nitems.push(pure);\nprint parallelMap(call, items, 2);\nprint parallelMap(ident, items, 2).get(1) == pure;\n"
+        self.assertEqual(run(source), "[4, 4]\ntrue\n")
+
+if __name__ == "__main__":
+    unittest.main()
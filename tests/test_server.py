@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+from tests.helpers import ROOT
+
+def serve(path: Path, timeout: float = 30) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, str(ROOT / "zaurshadow.py"), "--serve", str(path), "-j", "1"],
+        capture_output=True, text=True, timeout=timeout,
+    )
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs unix sockets")
+class ServeSocketTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name, "zsd.sock")
+
+    def test_keeps_a_regular_file(self):
+        self.path.write_text("data")
+        result = serve(self.path)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("not a socket", result.stderr)
+        self.assertEqual(self.path.read_text(), "data")
+
+    def test_keeps_a_live_socket(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as live:
+            live.bind(str(self.path))
+            live.listen()
+            result = serve(self.path)
+            self.assertNotEqual(result.returncode, 0)
+            self.assertIn("another server", result.stderr)
+            self.assertTrue(self.path.exists())
+
+    def test_replaces_a_stale_socket(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(str(self.path))
+        process = subprocess.Popen(
+            [sys.executable, str(ROOT / "zaurshadow.py"), "--serve", str(self.path), "-j", "1"],
+            stderr=subprocess.PIPE, text=True,
+        )
+        try:
+            assert process.stderr is not None
+            self.assertIn("Serving on", process.stderr.readline())
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            process.stderr.close()
+        self.assertFalse(os.path.exists(self.path))
+
+if __name__ == "__main__":
+    unittest.main()
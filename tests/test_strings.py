@@ -0,0 +1,13 @@
+import unittest
+from tests.helpers import run
+
+class StringIndexTest(unittest.TestCase):
+    def test_integral_floats(self):
+        source = 'var s = "abcdef";\nprint s.slice(4 / 2);\nprint s.slice(0, 6 / 2);\nprint s.find("d", 4 / 2);\n'
+        self.assertEqual(run(source), "cdef\nabc\n3\n")
+
+    def test_fractional_float(self):
+        self.assertIn("Expected an integer start index, got 1.5.", run('print "abc".slice(3 / 2);\n'))
+
+if __name__ == "__main__":
+    unittest.main()
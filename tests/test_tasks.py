@@ -0,0 +1,56 @@
+import threading
+import unittest
+from callables import ZSDNativeFunction
+from tests.helpers import make_interpreter, run, run_cli
+
+WORKERS = """
+declare worker(n) { await(sleep(0.01)); return n; }
+declare make(i) { declare job() { return worker(i); } return job; }
+var jobs = list();
+for i of 0..COUNT { jobs.push(spawn(make(i))); }
+var total = 0;
+for j of jobs { total += await(j); }
+print total;
+"""
+
+class TasksTest(unittest.TestCase):
+    def test_no_thread_per_task(self):
+        interpreter = make_interpreter()
+        counts: list[int] = []
+        interpreter.globals.define("threads", ZSDNativeFunction((0, 0), "threads", lambda: counts.append(threading.active_count())))
+        source = WORKERS.replace("COUNT", "2000").replace("await(sleep(0.01));", "await(sleep(0.01)); threads();")
+        before = threading.active_count()
+        self.assertEqual(run(source, interpreter), f"{sum(range(2000))}\n")
+        self.assertEqual(max(counts), before)
+
+    def test_suspended_tasks_keep_their_own_depth(self):
+        result = run_cli(WORKERS.replace("COUNT", "50"), "--max-depth", "20")
+        self.assertEqual(result.stdout, f"{sum(range(50))}\n")
+        self.assertEqual(result.returncode, 0)
+
+    def test_depth_limit_inside_a_task(self):
+        source = "declare f(n) { await(sleep(0)); return f(n + 1); }\ndeclare g() { return f(0); }\nawait(spawn(g));\n"
+        result = run_cli(source, "--max-depth", "20")
+        self.assertEqual(result.returncode, 70)
+        self.assertIn("Call depth limit of 20 exceeded.", result.stderr + result.stdout)
+
+    def test_interleaves(self):
+        source = (
+            "declare tick(name) { declare run() { for i of 0..3 { await(sleep(0.01)); print name + i; } } return run; }\n"
+            "var a = spawn(tick(\"a\"));\nawait(sleep(0.005));\nvar b = spawn(tick(\"b\"));\nawait(a); await(b);\n"
+        )
+        self.assertEqual(run(source), "a0\nb0\na1\nb1\na2\nb2\n")
+
+    def test_await_lets_ready_tasks_run(self):
+        self.assertEqual(run('declare job() { print "task"; }\nspawn(job);\nawait(sleep(0));\nprint "main";\n'), "task\nmain\n")
+
+    def test_await_in_an_expression(self):
+        source = "declare f() { return 1 + await(spawn(g)); }\ndeclare g() { await(sleep(0)); return 2; }\nprint await(spawn(f));\n"
+        self.assertEqual(run(source), "3\n")
+
+    def test_deadlock(self):
+        source = "var t;\ndeclare me() { return await(t); }\nt = spawn(me);\nprint await(t);\n"
+        self.assertIn("await() would wait forever", run(source))
+
+if __name__ == "__main__":
+    unittest.main()
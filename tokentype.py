@@ -32,6 +32,7 @@ class TokenType(Enum):
 
     IDENTIFIER = auto()
     STRING = auto()
+    INTERPOLATION = auto()
     NUMBER = auto()
     RANGE = auto()
 
@@ -47,6 +48,7 @@ class TokenType(Enum):
 
     DECLARE = auto()
     RETURN = auto()
+    YIELD = auto()
 
     NIL = auto()
     TRUE = auto()
@@ -77,6 +79,7 @@ keywords: dict[str, TokenType] = {
     "or": TokenType.OR,
     "print": TokenType.PRINT,
     "return": TokenType.RETURN,
+    "yield": TokenType.YIELD,
     "super": TokenType.SUPER,
     "true": TokenType.TRUE,
     "var": TokenType.VAR,
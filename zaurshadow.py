@@ -1,5 +1,14 @@
+import time
+STARTED = time.perf_counter()
+
+from argparse import ArgumentParser
+import atexit
+from contextlib import ExitStack
+import io
+import os
 from pathlib import Path
 import sys
+import typing
 
 from scanner import Scanner
 from zsdparser import Parser
@@ -12,37 +21,159 @@ from zsdtoken import Token
 from tokentype import TokenType as tt
 import natives
 
-interpreter = Interpreter()
-natives.inject(interpreter)
+# Profilers, stats and the batch runner are imported when their flag is given
+IMPORTED = time.perf_counter()
+
+if typing.TYPE_CHECKING:
+    from profiler import LineCounter
 
 def main():
-    if len(sys.argv) > 2:
-        raise SystemExit("This file takes a single optional argument.")
+    parser = ArgumentParser(prog="zaurshadow", description="Run a ZSD script, or start the REPL without one.")
+    parser.add_argument("file", nargs="?", type=Path)
+    parser.add_argument("--profile", action="store_true", help="print a per-function profile after the script")
+    parser.add_argument("--profile-output", metavar="FILE", help="write the profile as pstats-compatible stats")
+    parser.add_argument("--profile-collapsed", metavar="FILE", help="write the profile as collapsed stacks")
+    parser.add_argument("--sample", metavar="FILE", help="sample the running script and write collapsed stacks")
+    parser.add_argument("--sample-interval", type=float, default=5, metavar="MS", help="time between samples (default: 5)")
+    parser.add_argument("--coverage", metavar="FILE", help="count statement executions per line and write them as JSON")
+    parser.add_argument("--coverage-annotate", metavar="FILE", help="write the source annotated with execution counts")
+    parser.add_argument("--stats", action="store_true", help="count runtime events and print them after the script")
+    parser.add_argument("--max-steps", type=int, metavar="N", help="stop after N calls and loop iterations")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS", help="stop after running this long")
+    parser.add_argument("--max-depth", type=int, metavar="N", help="stop when calls nest deeper than N")
+    parser.add_argument("--batch", metavar="DIR|GLOB", help="run every script in a directory or matching a glob, print a JSON summary")
+    parser.add_argument("--serve", metavar="SOCKET", help="run scripts sent to this unix socket, see zsdclient.py")
+    parser.add_argument("--recycle", type=int, default=100, metavar="N", help="replace a --serve worker after N jobs (default: 100)")
+    parser.add_argument("--image", metavar="FILE", help="start from the globals saved in a heap image")
+    parser.add_argument("--save-image", metavar="FILE", help="save the globals to a heap image after the script ran")
+    parser.add_argument("--buffer-size", type=int, metavar="CHARS", help=f"hold printed output until this much is collected, 0 writes every print at once (default: {output.OUTPUT_BUFFER_SIZE}, 0 on a terminal)")
+    parser.add_argument("--startup-report", action="store_true", help="print how long each startup phase took before the first statement")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), metavar="N", help="worker processes for --batch and --serve (default: CPU count)")
+    args = parser.parse_args()
+    if args.startup_report and args.file is None:
+        parser.error("--startup-report needs a script file")
+
+    limits = (args.max_steps, args.timeout, args.max_depth)
+    if args.batch:
+        return runbatch(args.batch, args.jobs, limits)
+    if args.serve:
+        import server
+        buffer_size = output.OUTPUT_BUFFER_SIZE if args.buffer_size is None else args.buffer_size
+        return server.serve(args.serve, args.jobs, args.recycle, limits, buffer_size)
+
+    # A terminal shows every line as it's printed, a pipe or a file gets blocks
+    buffer_size = args.buffer_size
+    if buffer_size is None:
+        buffer_size = 0 if sys.stdout.isatty() else output.OUTPUT_BUFFER_SIZE
+    interpreter = Interpreter(output.BufferedStream(size=buffer_size) if buffer_size > 0 else None)
+    natives.inject(interpreter)
+    interpreter.set_limits(*limits)
+
+    if args.image or args.save_image:
+        import image
+        if args.image:
+            try:
+                image.load(interpreter, args.image)
+            except (OSError, image.ImageError) as e:
+                sys.exit(f"Cannot load image: {e}")
+
+    if args.stats:
+        import stats
+        stats.enable(interpreter)
+        atexit.register(print_stats, interpreter)
+
+    if args.file is None:
+        try:
+            while True:
+                line = input("> ")
+                runrepl(interpreter, line)
+        finally:
+            # However the session ends
+            if args.save_image:
+                save_image(interpreter, args.save_image)
     
-    elif len(sys.argv) == 1:
-        while True:
-            line = input("> ")
-            runrepl(line)
+    # The profilers hook different things, any of them can run together
+    with ExitStack() as finish:
+        if args.sample:
+            from profiler import SamplingProfiler
+            sampler = SamplingProfiler(args.sample_interval / 1000)
+            sampler.start()
+            finish.callback(sampler.dump_collapsed, args.sample)
+            finish.callback(sampler.print_report)
+            finish.callback(sampler.stop)
+
+        if args.coverage or args.coverage_annotate:
+            from profiler import LineCounter
+            counter = LineCounter()
+            counter.install(interpreter)
+            if args.coverage_annotate:
+                finish.callback(write_annotated, counter, args.coverage_annotate, args.file)
+            if args.coverage:
+                finish.callback(counter.dump_json, args.coverage, str(args.file))
+            finish.callback(counter.uninstall, interpreter)
+
+        if args.profile or args.profile_output or args.profile_collapsed:
+            from profiler import Profiler
+            profiler = Profiler()
+            profiler.install(interpreter)
+            if args.profile_collapsed:
+                finish.callback(profiler.dump_collapsed, args.profile_collapsed)
+            if args.profile_output:
+                finish.callback(profiler.dump_stats, args.profile_output, str(args.file))
+            if args.profile:
+                finish.callback(profiler.print_report)
+            finish.callback(profiler.uninstall, interpreter)
+
+        # Installed last, so it sees the first statement before any of the hooks above
+        phases = startup_report(interpreter) if args.startup_report else None
+        runfile(interpreter, args.file, phases)
+
+    if args.save_image:
+        save_image(interpreter, args.save_image)
+
+def write_annotated(counter: "LineCounter", path: str, file: Path):
+    with open(path, "w", encoding="utf-8") as output_file:
+        counter.write_annotated(output_file, file.read_text(encoding="utf-8"))
+
+def save_image(interpreter: Interpreter, path: str):
+    """Runs after the script, a script that failed leaves no image behind and an image that can't be saved fails the run"""
+    import image
+    if interpreter.reporter.had_error or interpreter.reporter.had_runtime_error:
+        return
+    try:
+        image.save(interpreter, path)
+    except (OSError, image.ImageError) as e:
+        sys.exit(f"Cannot save image: {e}")
+
+def print_stats(interpreter: Interpreter):
+    snapshot = interpreter.stats()
+    if snapshot is None:
+        return
     
-    runfile(Path(sys.argv[1]))
+    allocations = typing.cast("dict[str, int]", snapshot.pop("allocations"))
+    for name, value in snapshot.items():
+        print(f"{name:>16}: {value}", file=sys.stderr)
+    for name, value in sorted(allocations.items(), key=lambda item: item[1], reverse=True):
+        print(f"{"new " + name:>16}: {value}", file=sys.stderr)
 
 last_token = Token(tt.IDENTIFIER, "_", "", -1)
-def runrepl(source: str):
-    scanner = Scanner(source)
+def runrepl(interpreter: Interpreter, source: str):
+    reporter = interpreter.reporter
+    scanner = Scanner(source, reporter)
     tokens = scanner.scan_tokens()
 
-    parser = Parser(tokens)
+    parser = Parser(tokens, reporter)
     statements = parser.parse()
 
-    if output.had_error:
-        output.reset()
+    if reporter.had_error:
+        reporter.reset()
         return
     
     resolver = Resolver(interpreter)
     resolver.resolve(statements)
 
-    if output.had_error:
-        output.reset()
+    if reporter.had_error:
+        reporter.reset()
         return
     
     stmt = None
@@ -50,42 +181,135 @@ def runrepl(source: str):
         try:
             value = interpreter.evaluate(stmt.expression)
         except output.ZSDRuntimeError as e:
-            return output.runtime_error(e)
+            return reporter.runtime_error(e)
         
         interpreter.env.define(last_token.lexeme, value)
-        return print(value)
+        print(value, file=interpreter.stream)
+        return interpreter.flush()
     
     interpreter.interpret(statements)
 
-    output.reset()
+    reporter.reset()
+
+def startup_report(interpreter: Interpreter) -> dict[str, float]:
+    """
+    Start timing the phases before the first statement runs,
+    the report goes to stderr as soon as it does.
+    """
+    phases = {"imports": IMPORTED, "setup": time.perf_counter()}
+    modules = len(sys.modules)
+
+    def first_execute(statement):
+        # Only this layer goes, a tracer or the coverage counter keep running
+        interpreter.remove_hooks("startup report")
+        phases["first statement"] = time.perf_counter()
 
-def runfile(file: Path):
-    run(file.read_text(encoding="utf-8"))
+        previous = STARTED
+        print(f"{len(sys.modules) - modules} modules imported after startup, {modules} before", file=sys.stderr)
+        for name, end in phases.items():
+            print(f"{(end - previous) * 1000:>9.2f}ms  {name}", file=sys.stderr)
+            previous = end
+        print(f"{(previous - STARTED) * 1000:>9.2f}ms  total until the first statement", file=sys.stderr)
+        return interpreter.execute(statement)
 
-    if output.had_error:
+    interpreter.add_hook("startup report", "execute", lambda _: first_execute)
+    return phases
+
+def runfile(interpreter: Interpreter, file: Path, phases: dict[str, float] | None = None):
+    source = file.read_text(encoding="utf-8")
+    if phases is not None:
+        phases["read"] = time.perf_counter()
+    run(interpreter, source, phases)
+
+    if interpreter.reporter.had_error:
         sys.exit(65)
-    if output.had_runtime_error:
+    if interpreter.reporter.had_runtime_error:
         sys.exit(70)
 
-def run(source: str):
-    scanner = Scanner(source)
+def run(interpreter: Interpreter, source: str, phases: dict[str, float] | None = None):
+    """
+    Run a whole script, the interpreter's reporter tells how it went.
+    With `phases`, the time each stage finished is recorded in it.
+    """
+    reporter = interpreter.reporter
+    scanner = Scanner(source, reporter)
     tokens = scanner.scan_tokens()
+    if phases is not None:
+        phases["scan"] = time.perf_counter()
 
-    parser = Parser(tokens)
+    parser = Parser(tokens, reporter)
     statements = parser.parse()
+    if phases is not None:
+        phases["parse"] = time.perf_counter()
 
-    if output.had_error:
-        output.reset()
+    if reporter.had_error:
         return
     
     resolver = Resolver(interpreter)
     resolver.resolve(statements)
+    if phases is not None:
+        phases["resolve"] = time.perf_counter()
 
-    if output.had_error:
-        output.reset()
+    if reporter.had_error:
         return
     
     interpreter.interpret(statements)
 
+def batch_job(path: str, limits: tuple[int | None, float | None, int | None]) -> dict[str, object]:
+    """Run one script of a batch in a worker, with its output captured"""
+    stream = io.StringIO()
+    interpreter = Interpreter(stream)
+    natives.inject(interpreter)
+    interpreter.set_limits(*limits)
+
+    start = time.perf_counter()
+    try:
+        run(interpreter, Path(path).read_text(encoding="utf-8"))
+    except OSError as e:
+        print(e, file=stream)
+        exit_code = 66
+    except Exception as e:
+        # A crash in one script is that script's failure, the rest of the batch still runs
+        print(f"Internal error: {type(e).__name__}: {e}", file=stream)
+        exit_code = 70
+    else:
+        exit_code = 65 if interpreter.reporter.had_error else 70 if interpreter.reporter.had_runtime_error else 0
+
+    return {
+        "file": path,
+        "exit_code": exit_code,
+        "time": time.perf_counter() - start,
+        "output": stream.getvalue(),
+    }
+
+def runbatch(pattern: str, jobs: int, limits: tuple[int | None, float | None, int | None]):
+    import glob
+    import json
+    import multiprocessing
+
+    if os.path.isdir(pattern):
+        paths = sorted(str(path) for path in Path(pattern).glob("*.zsd"))
+    else:
+        paths = sorted(glob.glob(pattern, recursive=True))
+    if not paths:
+        sys.exit(f"No scripts match {pattern!r}.")
+
+    # Forked workers share the already imported runtime and natives copy-on-write
+    start = time.perf_counter()
+    with multiprocessing.get_context("fork").Pool(max(1, min(jobs, len(paths)))) as pool:
+        results = pool.starmap(batch_job, [(path, limits) for path in paths], chunksize=1)
+
+    failed = [result for result in results if result["exit_code"]]
+    json.dump({
+        "jobs": results,
+        "total": len(results),
+        "failed": len(failed),
+        "time": time.perf_counter() - start,
+    }, sys.stdout, indent=4)
+    print()
+
+    if failed:
+        sys.exit(max(typing.cast(int, result["exit_code"]) for result in failed))
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Thin client for `zaurshadow --serve`, a drop-in for `zaurshadow file.zsd`.
+It only imports what it needs to talk to the socket, that's the whole point.
+
+    python zsdclient.py /tmp/zsd.sock script.zsd
+    python zsdclient.py /tmp/zsd.sock - < script.zsd
+"""
+import json
+import os
+import socket
+import sys
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("usage: zsdclient.py SOCKET FILE|-")
+    _, path, file = sys.argv
+
+    # The server has its own working directory
+    request = {"source": sys.stdin.read()} if file == "-" else {"path": os.path.abspath(file)}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(request).encode() + b"\n")
+
+        for line in connection.makefile("rb"):
+            message = json.loads(line)
+            if "output" in message:
+                sys.stdout.write(message["output"])
+            else:
+                sys.stdout.flush()
+                sys.exit(message["exit"])
+
+    sys.exit("The server closed the connection without an exit status.")
+
+if __name__ == "__main__":
+    main()
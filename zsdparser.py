@@ -7,6 +7,7 @@ from expr import (
     Get,
     Grouping,
     InstanceOf,
+    Interpolation,
     LiteralValue,
     Logical,
     Range,
@@ -18,6 +19,7 @@ from expr import (
     AnonObject,
 )
 from output import ExpectedExpression, ParseError
+from scanner import Scanner
 from stmt import Param, Stmt, Function
 from zsdtoken import Token
 
@@ -27,9 +29,12 @@ from literals import false, true, nil
 from tokentype import TokenType as tt, TokenType
 
 class Parser:
-    def __init__(self, tokens: list[Token]) -> None:
+    def __init__(self, tokens: list[Token], reporter: output.Reporter | None = None) -> None:
         self.tokens = tokens
+        self.reporter = reporter or output.Reporter()
         self.current = 0
+        # Set by a yield, tells function() it's parsing a generator
+        self.has_yield = False
 
     def parse(self) -> list[Stmt]:
         statements: list[Stmt] = []
@@ -43,7 +48,11 @@ class Parser:
     
     def declaration(self):
         try:
-            if self.match(tt.VAR): return self.var_declaration()
+            if self.match(tt.VAR):
+                line = self.previous().line
+                statement = self.var_declaration()
+                statement.line = line
+                return statement
             return self.statement()
         except ParseError:
             self.synchronize()
@@ -63,6 +72,12 @@ class Parser:
     # region statements
 
     def statement(self):
+        line = self.peek().line
+        statement = self.statement_kind()
+        statement.line = line
+        return statement
+
+    def statement_kind(self):
         if self.match(tt.IF):  
             return self.if_statement()
         if self.match(tt.PRINT):
@@ -79,6 +94,8 @@ class Parser:
             return self.function("function")
         if self.match(tt.RETURN):
             return self.return_statement()
+        if self.match(tt.YIELD):
+            return self.yield_statement()
         if self.match(tt.CLASS):
             return self.class_declaration()
         
@@ -112,31 +129,35 @@ class Parser:
         Parse a block: A series of statements in a higher scope surrouded by braces.
         This method already assumes the left brace has been consumed
         """
+        line = self.previous().line
         statements: list[Stmt] = []
         while not self.check(tt.RIGHT_BRACE) and not self.is_at_end():
             obj = self.declaration()
             if obj: statements.append(obj)
     
         self.consume(tt.RIGHT_BRACE, "Expect '}' after block.")
-        return stmt.Block(statements)
+        block = stmt.Block(statements)
+        block.line = line
+        return block
     
     def while_statement(self):
+        keyword = self.previous()
         condition = self.expression()
         self.consume(tt.LEFT_BRACE, "Expect '{' after expression.")
         body = self.block()
 
-        return stmt.While(condition, body)
+        return stmt.While(keyword, condition, body)
     
     def dowhile(self):
         self.consume(tt.LEFT_BRACE, "Expect '{' after do.")
 
         body = self.block()
-        self.consume(tt.WHILE, "Expect 'while' after do-while body.")
+        keyword = self.consume(tt.WHILE, "Expect 'while' after do-while body.")
 
         condition = self.expression()
         self.consume(tt.SEMICOLON, "Expect ';' after do-while condition.")
 
-        return stmt.Block([body, stmt.While(condition, body)])
+        return stmt.Block([body, stmt.While(keyword, condition, body)])
 
     def print_statement(self):
         value = self.expression()
@@ -188,7 +209,7 @@ class Parser:
         if increment is not None:
             body = stmt.Block([body, stmt.Expression(increment)])
 
-        body = stmt.While(condition, body)
+        body = stmt.While(for_token, condition, body)
         if initializer is not None:
             body = stmt.Block([initializer, body])
 
@@ -212,7 +233,7 @@ class Parser:
                     had_default = True
                 else:
                     if had_default:
-                        output.error(name, "Cannot follow default parameter with a non default one.")
+                        self.reporter.error(name, "Cannot follow default parameter with a non default one.")
                     default = None
 
                 parameters.append(Param(name, default))
@@ -227,8 +248,12 @@ class Parser:
             self.consume(tt.RIGHT_PAREN, f"Expect ')' after parameter field.")
 
         self.consume(tt.LEFT_BRACE, "Expect '{' after %s declaration" % fn_type)
+        enclosing_has_yield, self.has_yield = self.has_yield, False
         body = self.block()
-        return stmt.Function(name, parameters, body)
+        has_yield, self.has_yield = self.has_yield, enclosing_has_yield
+
+        yielding = frozenset(yielding_statements(body)) if has_yield else frozenset()
+        return stmt.Function(name, parameters, body, yielding)
     
     def return_statement(self):
         keyword = self.previous()
@@ -240,6 +265,17 @@ class Parser:
 
         return stmt.Return(keyword, value)
     
+    def yield_statement(self):
+        keyword = self.previous()
+        if self.match(tt.SEMICOLON):
+            value = LiteralValue(nil)
+        else:
+            value = self.expression()
+            self.consume(tt.SEMICOLON, "Expect ';' after expression.")
+
+        self.has_yield = True
+        return stmt.Yield(keyword, value)
+    
     def class_declaration(self):
         name = self.consume(tt.IDENTIFIER, "Expect class name.")
 
@@ -340,7 +376,7 @@ class Parser:
             return InstanceOf(expr, operator, right)
         
         if exc is not None:
-            output.error(exc.token, exc.message)
+            self.reporter.error(exc.token, exc.message)
             raise exc
         
         assert expr is not None
@@ -414,6 +450,9 @@ class Parser:
         if self.match(tt.NUMBER, tt.STRING):
             return LiteralValue(self.previous().literal)
         
+        if self.match(tt.INTERPOLATION):
+            return self.interpolation()
+
         if self.match(tt.LEFT_PAREN):
             expr = self.expression()
             self.consume(tt.RIGHT_PAREN, "Expected ')' after expression.")
@@ -462,6 +501,33 @@ class Parser:
         return Call(callee, paren, arguments)
     
      
+    def interpolation(self):
+        """
+        Parse the expressions of an interpolated string, the scanner already split it.
+        The constant parts stay as they are, so nothing is left to parse at runtime.
+        """
+        token = self.previous()
+        parts: list[str | Expr] = []
+
+        for i, part in enumerate(typing.cast("list[str]", token.literal)):
+            if i % 2 == 0:
+                if part: parts.append(part)
+                continue
+
+            scanner = Scanner(part, self.reporter)
+            scanner.line = token.line
+            parser = Parser(scanner.scan_tokens(), self.reporter)
+            try:
+                parts.append(parser.expression())
+            except ParseError:
+                # Already reported, don't let an outer instanceof() report it again
+                raise ParseError() from None
+
+            if not parser.is_at_end():
+                raise self.error(parser.peek(), "Expect '}' after interpolated expression.")
+
+        return Interpolation(parts)
+    
     def anonymous_object(self):
         attributes: dict[Token, Expr] = {}
         methods: dict[str, Function] = {}
@@ -554,7 +620,7 @@ class Parser:
 
     def error(self, token: Token, message: str):
         """Report an error and return an exception class"""
-        output.error(token, message)
+        self.reporter.error(token, message)
         return ParseError()
     
     def synchronize(self):
@@ -566,7 +632,28 @@ class Parser:
             if self.peek().type in (
                 tt.CLASS, tt.DECLARE, tt.VAR, 
                 tt.FOR, tt.IF, tt.WHILE, tt.PRINT, 
-                tt.RETURN
+                tt.RETURN, tt.YIELD
             ): return
 
-            self.advance()
\ No newline at end of file
+            self.advance()
+
+def yielding_statements(node: Stmt) -> set[Stmt]:
+    """The statements that have a yield in them, nested functions and classes are their own business"""
+    match node:
+        case stmt.Yield():
+            children = []
+        case stmt.Block():
+            children = node.statements
+        case stmt.If():
+            children = [body for _, body in node.conditions]
+            if node.else_branch:
+                children.append(node.else_branch)
+        case stmt.While() | stmt.For():
+            children = [node.body]
+        case _:
+            return set()
+
+    found = set().union(*map(yielding_statements, children))
+    if found or isinstance(node, stmt.Yield):
+        found.add(node)
+    return found